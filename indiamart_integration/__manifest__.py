@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 {
     'name': 'IndiaMART Integration',
-    'version': '19.0.1.0.0',
+    'version': '19.0.1.2.0',
     'summary': 'Integrate IndiaMART Pull API to fetch leads into Odoo CRM.',
     'author': 'Your Name',
     'website': 'Your Website',
@@ -9,6 +9,7 @@
     'icon': 'static/description/icon.png',
     'depends': [
         'crm',
+        'lead_ingestion_core',
     ],
     'data': [
         'security/ir.model.access.csv',
@@ -18,6 +19,8 @@
         'views/indiamart_settings_views.xml',
         'views/indiamart_fetch_leads_wizard_views.xml',
         'views/indiamart_api_log_views.xml',
+        'views/indiamart_inquiry_views.xml',
+        'views/indiamart_backfill_views.xml',
     ],
     'installable': True,
     'application': True,
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    '''The all-accounts fetch of lead_ingestion_core replaces the scheduled
+    action of this source; keeping both would poll every account twice.'''
+    cr.execute("""
+        UPDATE ir_cron cron
+           SET active = false
+          FROM ir_model_data imd
+         WHERE imd.model = 'ir.cron' AND imd.res_id = cron.id
+           AND imd.module = 'indiamart_integration' AND imd.name = 'ir_cron_indiamart_fetch'
+           AND cron.active
+    """)
+    if cr.rowcount:
+        _logger.info("Archived the indiamart scheduled fetch, superseded by the all-accounts fetch")
@@ -2,4 +2,5 @@
 from . import indiamart_settings
 from . import crm_lead
 from . import indiamart_fetch_leads_wizard
-from . import indiamart_api_log
\ No newline at end of file
+from . import indiamart_api_log
+from . import indiamart_backfill
\ No newline at end of file
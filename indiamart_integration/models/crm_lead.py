@@ -4,7 +4,7 @@ from odoo import fields, models
 class CrmLead(models.Model):
     _inherit = 'crm.lead'
 
-    indiamart_unique_id = fields.Char(string="IndiaMART Unique ID", readonly=True, index=True)
+    indiamart_unique_id = fields.Char(string="IndiaMART Unique ID", readonly=True)
     
     # ADD THIS NEW FIELD
     indiamart_query_type = fields.Selection(
@@ -18,3 +18,10 @@ class CrmLead(models.Model):
         string="IndiaMART Lead Type",
         readonly=True
     )
+
+    # Partial unique index: also serves the IN lookups of the duplicate check
+    # and makes overlapping fetch runs unable to import the same inquiry twice
+    _indiamart_unique_id_uniq = models.UniqueIndex(
+        '(indiamart_unique_id) WHERE indiamart_unique_id IS NOT NULL',
+        "This IndiaMART inquiry has already been imported.",
+    )
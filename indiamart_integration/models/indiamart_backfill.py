@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+# FILE: indiamart_integration/models/indiamart_backfill.py
+
+import logging
+from datetime import timedelta
+from odoo import fields, models, api
+from odoo.exceptions import UserError, ValidationError
+from .indiamart_settings import MAX_WINDOW_DAYS, MIN_CALL_INTERVAL_MINUTES, format_ist
+
+_logger = logging.getLogger(__name__)
+
+# Consecutive failures of the same window before the job stops
+MAX_WINDOW_RETRIES = 5
+
+class IndiaMARTBackfill(models.Model):
+    _name = 'indiamart.backfill'
+    _description = 'IndiaMART Backfill Job'
+    _order = 'id desc'
+
+    name = fields.Char(string="Job", compute='_compute_name', store=True)
+    settings_id = fields.Many2one(
+        'indiamart.settings',
+        string="Account",
+        required=True,
+        ondelete='cascade',
+        default=lambda self: self.env['indiamart.settings']._ingestion_default_account()
+    )
+    start_time = fields.Datetime(string="Start Date", required=True)
+    end_time = fields.Datetime(string="End Date", required=True, default=fields.Datetime.now)
+    window_days = fields.Integer(
+        string="Window (Days)",
+        default=MAX_WINDOW_DAYS,
+        help="Length of the date range requested per API call (at most 7 days)."
+    )
+    call_interval = fields.Integer(
+        string="Call Spacing (Minutes)",
+        default=MIN_CALL_INTERVAL_MINUTES,
+        help="Minimum time between two calls with this account's API key."
+    )
+    state = fields.Selection(
+        [
+            ('draft', 'Draft'),
+            ('running', 'Running'),
+            ('done', 'Done'),
+            ('failed', 'Failed'),
+            ('cancelled', 'Cancelled'),
+        ],
+        string="Status",
+        default='draft',
+        required=True,
+        readonly=True
+    )
+    next_window_start = fields.Datetime(
+        string="Checkpoint",
+        readonly=True,
+        copy=False,
+        help="Start of the next window to fetch. A restarted worker resumes from here."
+    )
+    retry_count = fields.Integer(string="Retries", readonly=True, copy=False)
+    leads_fetched = fields.Integer(string="Leads Fetched", readonly=True, copy=False)
+    leads_created = fields.Integer(string="Leads Created", readonly=True, copy=False)
+    progress = fields.Float(string="Progress", compute='_compute_progress')
+    log_ids = fields.One2many('indiamart.api.log', 'backfill_id', string="API Calls", readonly=True)
+
+    @api.depends('start_time', 'end_time')
+    def _compute_name(self):
+        for job in self:
+            job.name = f"Backfill {job.start_time} → {job.end_time}"
+
+    @api.depends('start_time', 'end_time', 'next_window_start', 'state')
+    def _compute_progress(self):
+        for job in self:
+            if job.state == 'done':
+                job.progress = 100.0
+            elif not job.start_time or not job.end_time or not job.next_window_start:
+                job.progress = 0.0
+            else:
+                total = (job.end_time - job.start_time).total_seconds() or 1.0
+                job.progress = min(100.0, 100.0 * (job.next_window_start - job.start_time).total_seconds() / total)
+
+    @api.constrains('start_time', 'end_time', 'window_days', 'call_interval')
+    def _check_range(self):
+        for job in self:
+            if job.start_time >= job.end_time:
+                raise ValidationError("Error: Start Date must be before End Date.")
+            if not 1 <= job.window_days <= MAX_WINDOW_DAYS:
+                raise ValidationError(f"Error: The window must be between 1 and {MAX_WINDOW_DAYS} days.")
+            if job.call_interval < MIN_CALL_INTERVAL_MINUTES:
+                raise ValidationError(f"Error: IndiaMART requires at least {MIN_CALL_INTERVAL_MINUTES} minutes between calls.")
+
+    def action_start(self):
+        for job in self:
+            if not job.settings_id.api_key:
+                raise UserError("IndiaMART API Key is not set.")
+            job.write({
+                'state': 'running',
+                'next_window_start': job.next_window_start or job.start_time,
+                'retry_count': 0,
+            })
+        self.env.ref('indiamart_integration.ir_cron_indiamart_backfill')._trigger()
+
+    def action_cancel(self):
+        self.filtered(lambda job: job.state in ('draft', 'running', 'failed')).write({'state': 'cancelled'})
+
+    def _get_window(self):
+        self.ensure_one()
+        window_end = min(self.next_window_start + timedelta(days=self.window_days), self.end_time)
+        return self.next_window_start, window_end
+
+    def _next_call_time(self):
+        '''Earliest time the account's API key may be called again'''
+        self.ensure_one()
+        last_call = self.settings_id.last_api_call
+        if not last_call:
+            return fields.Datetime.now()
+        return last_call + timedelta(minutes=self.call_interval)
+
+    @api.model
+    def _cron_run_backfills(self):
+        '''Fetch one window per running job whose account may be called, commit,
+        and schedule the next run when the spacing rule allows the next call.'''
+        cron = self.env.ref('indiamart_integration.ir_cron_indiamart_backfill')
+        busy_accounts = set()
+        for job in self.search([('state', '=', 'running')], order='id'):
+            if job.settings_id.id in busy_accounts:
+                continue
+            if job._next_call_time() > fields.Datetime.now():
+                cron._trigger(at=job._next_call_time())
+                busy_accounts.add(job.settings_id.id)
+                continue
+
+            job._run_window()
+            busy_accounts.add(job.settings_id.id)
+            # Checkpoint: a restarted worker resumes after this window
+            self.env.cr.commit()
+            if job.state == 'running':
+                cron._trigger(at=job._next_call_time())
+
+    def _run_window(self):
+        self.ensure_one()
+        window_start, window_end = self._get_window()
+        total = (self.end_time - self.start_time).total_seconds() or 1.0
+        done = (window_end - self.start_time).total_seconds()
+        stats = self.settings_id._run_ingestion(
+            is_manual=False,
+            extra_log_vals={'backfill_id': self.id},
+            # The job counts what each window created
+            process_now=True,
+            start_time=format_ist(window_start),
+            end_time=format_ist(window_end),
+        )
+        # The log record only knows its counters: prefix the window and progress
+        log = self.env['indiamart.api.log'].search([('backfill_id', '=', self.id)], order='id desc', limit=1)
+        log.response_message = f"Backfill window {window_start} → {window_end} ({100.0 * done / total:.0f}%)\n{log.response_message or ''}"
+
+        if stats['skipped']:
+            # The account is busy with another fetch: same window next time
+            return
+
+        if stats['error']:
+            retry_count = self.retry_count + 1
+            _logger.warning(f"IndiaMART backfill {self.id}: window {window_start} failed ({retry_count}/{MAX_WINDOW_RETRIES})")
+            self.write({
+                'retry_count': retry_count,
+                'state': 'failed' if retry_count >= MAX_WINDOW_RETRIES else 'running',
+            })
+            return
+
+        _logger.info(f"IndiaMART backfill {self.id}: window {window_start} → {window_end} done")
+        self.write({
+            'next_window_start': window_end,
+            'retry_count': 0,
+            'leads_fetched': self.leads_fetched + stats['fetched'],
+            'leads_created': self.leads_created + stats['created'],
+            'state': 'done' if window_end >= self.end_time else 'running',
+        })
@@ -3,29 +3,66 @@
 
 import requests
 import logging
-from datetime import datetime, timedelta
-from odoo import fields, models, api
+import pytz
+from datetime import timedelta
+from odoo import fields, models
 from odoo.exceptions import UserError
+from odoo.addons.lead_ingestion_core.tools import http_get
 
 _logger = logging.getLogger(__name__)
 
+API_URL = "https://mapi.indiamart.com/wservce/crm/crmListing/v2/"
+PROBABILITY_MAP = {'P': 75, 'W': 50, 'WA': 40, 'B': 25, 'BIZ': 10}
+# IndiaMART rejects calls made less than 5 minutes after the previous one
+MIN_CALL_INTERVAL_MINUTES = 5
+# Longest start_time/end_time range accepted by one call
+MAX_WINDOW_DAYS = 7
+
+
+def format_ist(value):
+    '''Naive UTC datetime -> IST string in the API's %d-%m-%Y%H:%M:%S format'''
+    return pytz.utc.localize(value).astimezone(pytz.timezone('Asia/Kolkata')).strftime('%d-%m-%Y%H:%M:%S')
+
+
 class IndiaMARTSettings(models.Model):
     _name = 'indiamart.settings'
+    _inherit = ['lead.ingestion.source.mixin']
     _description = 'IndiaMART API Settings'
 
-    name = fields.Char(default='IndiaMART API Configuration', readonly=True, required=True)
+    _ingestion_source_name = 'IndiaMART'
+    _ingestion_unique_field = 'indiamart_unique_id'
+    _ingestion_log_model = 'indiamart.api.log'
+    _ingestion_min_poll_interval = MIN_CALL_INTERVAL_MINUTES
+    _ingestion_push_source = 'indiamart'
+    _ingestion_description_fields = [
+        ('subject', 'Subject'), ('message', 'Message'), None,
+        ('product', 'Product'), ('category', 'Category'), ('location', 'Location'),
+        ('query_type', 'Query Type'), ('query_time', 'Query Time'), ('unique_id', 'IndiaMART ID'),
+    ]
+
+    name = fields.Char(string="Account", default='IndiaMART API Configuration', required=True)
     api_key = fields.Char(string="IndiaMART API Key", help="The Pull API Key from IndiaMART seller panel.")
+    last_api_call = fields.Datetime(
+        string="Last API Call",
+        readonly=True,
+        copy=False,
+        help="Time of the last call to the Pull API, used to space calls."
+    )
+
+    def _get_api_url(self):
+        '''API_URL, unless the indiamart_integration.api_url system parameter
+        points elsewhere (e.g. the mock server of the benchmarks)'''
+        return self.env['ir.config_parameter'].sudo().get_param('indiamart_integration.api_url') or API_URL
 
     def action_test_connection(self):
         self.ensure_one()
         if not self.api_key:
             raise UserError("Please enter an IndiaMART API Key before testing.")
             
-        api_url = "https://mapi.indiamart.com/wservce/crm/crmListing/v2/"
         params = {'glusr_crm_key': self.api_key}
         
         try:
-            response = requests.get(api_url, params=params, timeout=10)
+            response = http_get(self._get_api_url(), params=params, read_timeout=10, retry_reads=False)
             response.raise_for_status()
             data = response.json()
             
@@ -48,142 +85,92 @@ class IndiaMARTSettings(models.Model):
         except ValueError:
             raise UserError("Invalid response from IndiaMART API.")
 
-    @api.model
-    def _run_scheduled_fetch(self):
-        '''Cron job - runs every 5 minutes using API's built-in last-24h logic'''
-        _logger.info("=== IndiaMART Scheduled Fetch Started ===")
-        log_vals = {'is_manual': False}
-        
-        try:
-            settings = self.env['indiamart.settings'].search([], limit=1)
-            if not settings or not settings.api_key:
-                raise Exception("API Key not configured")
+    # ------------------------------------------------------------
+    # Ingestion adapter
+    # ------------------------------------------------------------
 
-            _logger.info("Fetching NEW leads (API will return leads since last API call)")
-            
-            # Use the simple approach: API without start_time and end_time
-            # This automatically returns leads from the last 24 hours,
-            # or from last API call if called within 24 hours
-            api_url = "https://mapi.indiamart.com/wservce/crm/crmListing/v2/"
-            params = {
-                'glusr_crm_key': settings.api_key
-                # No start_time or end_time needed!
-            }
+    def _ingestion_check_credentials(self):
+        if not self.api_key:
+            raise UserError("IndiaMART API Key is not set.")
 
-            response = requests.get(api_url, params=params, timeout=30)
-            response.raise_for_status()
+    def _ingestion_is_throttled(self, stats):
+        # The rate limit answer is a FAILURE payload with CODE 429, not an HTTP 429
+        error = stats['error'] or ''
+        return super()._ingestion_is_throttled(stats) or 'crossed this limit' in error or 'once in every' in error
+
+    def _ingestion_earliest_call(self):
+        # Manual fetches and backfills call the same API
+        if self.last_api_call:
+            return self.last_api_call + timedelta(minutes=MIN_CALL_INTERVAL_MINUTES)
+        return None
+
+    def _ingestion_fetch_pages(self, start_time=None, end_time=None):
+        '''Without start_time and end_time the API returns the leads since the
+        last API call, or from the last 24 hours. Times are IST strings
+        formatted as %d-%m-%Y%H:%M:%S.'''
+        params = {'glusr_crm_key': self.api_key}
+        if start_time and end_time:
+            params.update({'start_time': start_time, 'end_time': end_time})
+
+        metrics = self._ingestion_metrics()
+        self.last_api_call = fields.Datetime.now()
+        with metrics.timed('network'):
+            # Served once: the pull without dates returns what is new since the
+            # last call, and every call counts against the 5 minute limit
+            response = http_get(self._get_api_url(), params=params, stream=self.stream_responses, retry_reads=False)
+        if self.stream_responses:
+            with response:
+                if not response.ok:
+                    metrics.record_response(response.status_code, 0)
+                response.raise_for_status()
+                # Pages of batch_size straight from the RESPONSE array
+                meta = yield from self._ingestion_stream_pages(response, key='RESPONSE')
+            if meta.get('STATUS') == 'FAILURE':
+                raise UserError(f"IndiaMART API Error: {meta.get('MESSAGE')}")
+            return
+
+        metrics.record_response(response.status_code, len(response.content))
+        response.raise_for_status()
+        with metrics.timed('parse'):
             data = response.json()
 
-            if data.get('STATUS') == 'FAILURE':
-                raise Exception(f"IndiaMART API Error: {data.get('MESSAGE')}")
+        if data.get('STATUS') == 'FAILURE':
+            raise UserError(f"IndiaMART API Error: {data.get('MESSAGE')}")
+        yield data.get('RESPONSE') or []
 
-            leads_data = data.get('RESPONSE', [])
-            total_received = len(leads_data)
-            log_vals['leads_fetched'] = total_received
-            
-            _logger.info(f"API returned {total_received} leads")
+    def _ingestion_push_records(self, data):
+        '''The Push API posts one inquiry per call, wrapped like a Pull API
+        answer: {"CODE": 200, "STATUS": "SUCCESS", "RESPONSE": {...}}'''
+        if isinstance(data, dict) and 'RESPONSE' in data:
+            data = data['RESPONSE']
+        return super()._ingestion_push_records(data)
 
-            new_leads_count = 0
-            failed_count = 0
-            
-            if leads_data:
-                Lead = self.env['crm.lead']
-                
-                # Get or create IndiaMART source
-                indiamart_source = self.env['utm.source'].search([('name', '=', 'IndiaMART')], limit=1)
-                if not indiamart_source:
-                    indiamart_source = self.env['utm.source'].create({'name': 'IndiaMART'})
-                indiamart_source_id = indiamart_source.id
-                
-                for lead in leads_data:
-                    unique_id = lead.get('UNIQUE_QUERY_ID')
-                    sender_name = lead.get('SENDER_NAME', 'Unknown')
-                    
-                    if not unique_id:
-                        _logger.warning(f"» Skipped: {sender_name} - No UNIQUE_QUERY_ID")
-                        continue
-
-                    query_type = lead.get('QUERY_TYPE')
-                    probability_map = {'P': 75, 'W': 50, 'WA': 40, 'B': 25, 'BIZ': 10}
-                    
-                    vals = {
-                        'type': 'lead',
-                        'name': f"{sender_name} - {lead.get('SUBJECT', 'Inquiry')}",
-                        'indiamart_unique_id': unique_id,
-                        'contact_name': sender_name,
-                        'probability': probability_map.get(query_type, 10),
-                        'user_id': False,
-                        'team_id': False,
-                        'source_id': indiamart_source_id,
-                    }
-                    
-                    if lead.get('SENDER_COMPANY'):
-                        vals['partner_name'] = lead.get('SENDER_COMPANY')
-                    if lead.get('SENDER_EMAIL'):
-                        vals['email_from'] = lead.get('SENDER_EMAIL')
-                    if lead.get('SENDER_MOBILE'):
-                        vals['phone'] = lead.get('SENDER_MOBILE')
-                    if lead.get('SENDER_CITY'):
-                        vals['city'] = lead.get('SENDER_CITY')
-                    if lead.get('SENDER_ADDRESS'):
-                        vals['street'] = lead.get('SENDER_ADDRESS')
-                    if lead.get('SENDER_PINCODE'):
-                        vals['zip'] = lead.get('SENDER_PINCODE')
-                    
-                    if lead.get('SENDER_STATE'):
-                        state = self.env['res.country.state'].search([('name', '=', lead.get('SENDER_STATE'))], limit=1)
-                        if state:
-                            vals['state_id'] = state.id
-                    
-                    if lead.get('SENDER_COUNTRY_ISO'):
-                        country = self.env['res.country'].search([('code', '=', lead.get('SENDER_COUNTRY_ISO'))], limit=1)
-                        if country:
-                            vals['country_id'] = country.id
-                    
-                    if query_type:
-                        try:
-                            vals['indiamart_query_type'] = query_type
-                        except:
-                            pass
-                    
-                    description = (
-                        f"IndiaMART Lead\n{'='*50}\n"
-                        f"Subject: {lead.get('SUBJECT', 'N/A')}\n"
-                        f"Message: {lead.get('QUERY_MESSAGE', 'N/A')}\n\n"
-                        f"Product: {lead.get('QUERY_PRODUCT_NAME', 'N/A')}\n"
-                        f"Category: {lead.get('QUERY_MCAT_NAME', 'N/A')}\n"
-                        f"Location: {lead.get('SENDER_CITY', '')}, {lead.get('SENDER_STATE', '')}\n"
-                        f"Query Type: {query_type}\n"
-                        f"Query Time: {lead.get('QUERY_TIME', 'N/A')}\n"
-                        f"IndiaMART ID: {unique_id}\n"
-                    )
-                    vals['description'] = description
-                    
-                    try:
-                        new_lead = Lead.with_context(
-                            default_user_id=False,
-                            default_team_id=False,
-                            mail_create_nosubscribe=True,
-                        ).create(vals)
-                        new_leads_count += 1
-                        _logger.info(f"✓ Created: {sender_name} (Lead ID: {new_lead.id})")
-                    except Exception as e:
-                        failed_count += 1
-                        _logger.error(f"✗ Failed to create lead {unique_id}: {str(e)}")
-            
-            message = f"Created {new_leads_count} new leads (API returned {total_received} total)"
-            if failed_count > 0:
-                message += f", {failed_count} failed"
-            
-            log_vals.update({
-                'status': 'success',
-                'leads_created': new_leads_count,
-                'response_message': message
-            })
-            _logger.info(f"✓ {message}")
-
-        except Exception as e:
-            log_vals.update({'status': 'failure', 'response_message': str(e)})
-            _logger.error(f"✗ Failed: {e}", exc_info=True)
-        finally:
-            self.env['indiamart.api.log'].create(log_vals)
\ No newline at end of file
+    def _ingestion_map_record(self, lead):
+        unique_id = lead.get('UNIQUE_QUERY_ID')
+        sender_name = lead.get('SENDER_NAME', 'Unknown')
+        query_type = lead.get('QUERY_TYPE')
+        return {
+            'unique_id': unique_id,
+            'name': f"{sender_name} - {lead.get('SUBJECT', 'Inquiry')}",
+            'contact_name': sender_name,
+            'probability': PROBABILITY_MAP.get(query_type, 10),
+            'partner_name': lead.get('SENDER_COMPANY'),
+            'email_from': lead.get('SENDER_EMAIL'),
+            'phone': lead.get('SENDER_MOBILE'),
+            'city': lead.get('SENDER_CITY'),
+            'street': lead.get('SENDER_ADDRESS'),
+            'zip': lead.get('SENDER_PINCODE'),
+            'state': lead.get('SENDER_STATE'),
+            'country': lead.get('SENDER_COUNTRY_ISO'),
+            'inquiry': {
+                'unique_id': unique_id,
+                'subject': lead.get('SUBJECT'),
+                'message': lead.get('QUERY_MESSAGE'),
+                'product': lead.get('QUERY_PRODUCT_NAME'),
+                'category': lead.get('QUERY_MCAT_NAME'),
+                'location': f"{lead.get('SENDER_CITY', '')}, {lead.get('SENDER_STATE', '')}",
+                'query_type': query_type,
+                'query_time': lead.get('QUERY_TIME'),
+            },
+            'extra_vals': {'indiamart_query_type': query_type} if query_type in PROBABILITY_MAP else {},
+        }
@@ -0,0 +1,4 @@
+# -*- coding: utf-8 -*-
+from . import test_indiamart_fetch
+from . import test_indiamart_push
+from . import test_ingestion_benchmark
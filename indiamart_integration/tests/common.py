@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+# FILE: indiamart_integration/tests/common.py
+
+from odoo.addons.lead_ingestion_core.tests.common import IngestionBenchmarkCase
+
+
+class IndiaMARTCase(IngestionBenchmarkCase):
+    _api_url_param = 'indiamart_integration.api_url'
+    _mock_url = 'indiamart_url'
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.settings = cls.env.ref('indiamart_integration.indiamart_settings_default')
+        # Every scheduled run of a test calls the API
+        cls.settings.write({'api_key': 'mock-key', 'adaptive_polling': False})
+
+    def count_leads(self, unique_field='indiamart_unique_id'):
+        return super().count_leads(unique_field)
+
+    def last_log(self):
+        return self.env['indiamart.api.log'].search([], order='id desc', limit=1)
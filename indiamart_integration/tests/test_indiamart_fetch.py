@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+# FILE: indiamart_integration/tests/test_indiamart_fetch.py
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from odoo import fields
+from odoo.sql_db import db_connect
+from odoo.tests import tagged
+from odoo.tools import mute_logger
+from .common import IndiaMARTCase
+
+
+@tagged('post_install', '-at_install')
+class TestIndiaMARTFetch(IndiaMARTCase):
+
+    def test_scheduled_fetch_stages_then_processes(self):
+        self.mock.reset(total=20)
+        self.settings._run_scheduled_fetch()
+        log = self.last_log()
+        self.assertEqual(log.status, 'success')
+        self.assertEqual(log.leads_fetched, 20)
+        self.assertTrue(log.raw_archive_id)
+        self.assertEqual(self.count_leads(), 0, "Scheduled fetches only stage inquiries")
+
+        self.env['lead.ingestion.inquiry']._cron_process_pending()
+        self.assertEqual(self.count_leads(), 20)
+        self.assertEqual(log.leads_created, 20)
+        lead = self.env['crm.lead'].search([('indiamart_unique_id', '=', f"{self.mock.batch_prefix}00000001")])
+        self.assertEqual(lead.state_id, self.env.ref('base.state_in_dl'))
+        self.assertEqual(lead.indiamart_query_type, 'B')
+        # Fast ingest: no tracking, one batched creation message
+        self.assertEqual(lead.message_ids.mapped('body'), ['<p>Lead created from IndiaMART</p>'])
+
+    def test_processing_failure_fails_only_its_inquiry(self):
+        self.mock.reset(total=8)
+        self.settings._run_scheduled_fetch()
+        broken_id = f"{self.mock.batch_prefix}00000003"
+        ingest_records = type(self.settings)._ingest_records
+
+        def ingest(settings, records, *args, **kwargs):
+            if any(record.get('UNIQUE_QUERY_ID') == broken_id for record in records):
+                raise ValueError("Broken inquiry")
+            return ingest_records(settings, records, *args, **kwargs)
+
+        with patch.object(type(self.settings), '_ingest_records', ingest):
+            self.env['lead.ingestion.inquiry']._cron_process_pending()
+        self.assertEqual(self.count_leads(), 7)
+        failed = self.env['lead.ingestion.inquiry'].search([('state', '=', 'failed'), ('unique_id', '=like', f"{self.mock.batch_prefix}%")])
+        self.assertEqual(failed.mapped('unique_id'), [broken_id])
+        self.assertEqual(failed.error, "Broken inquiry")
+        self.assertEqual(self.last_log().leads_created, 7)
+
+    def test_wizard_fetch_skips_duplicates(self):
+        self.mock.reset(total=15)
+        wizard = self.env['indiamart.fetch.leads.wizard'].create({
+            'start_time': datetime.now() - timedelta(days=1),
+            'end_time': datetime.now(),
+        })
+        wizard.action_fetch_leads()
+        self.assertEqual(self.count_leads(), 15)
+        self.assertIn('start_time', self.mock.requests[-1][1])
+
+        wizard.action_fetch_leads()
+        self.assertEqual(self.count_leads(), 15)
+        self.assertIn('Skipped (Duplicate): 15', self.last_log().response_message)
+
+    def test_admin_fetch_and_replay(self):
+        '''Administrators may not write API logs: the pipeline does it for them'''
+        admin_env = self.env(user=self.env.ref('base.user_admin'), su=False)
+        self.mock.reset(total=5)
+        wizard = admin_env['indiamart.fetch.leads.wizard'].create({
+            'start_time': datetime.now() - timedelta(days=1),
+            'end_time': datetime.now(),
+        })
+        wizard.action_fetch_leads()
+        self.assertEqual(self.count_leads(), 5)
+        log = admin_env['indiamart.api.log'].search([], order='id desc', limit=1)
+        self.assertEqual(log.leads_created, 5)
+
+        self.env['crm.lead'].search([('indiamart_unique_id', '=like', f"{self.mock.batch_prefix}%")]).unlink()
+        log.action_replay()
+        self.assertEqual(self.count_leads(), 5)
+        self.assertTrue(self.last_log().is_replay)
+
+    def test_existing_contacts_are_linked(self):
+        self.mock.reset(total=4)
+        by_email = self.env['res.partner'].create({'name': 'Known Buyer', 'email': f"BUYER1.{self.mock.batch_prefix}@example.com"})
+        by_phone = self.env['res.partner'].create({'name': 'Known Caller', 'phone': f"+91 98{self.mock.batch_prefix}000002"})
+        stats = self.settings._run_ingestion(is_manual=True)
+        self.assertEqual(stats['partners'], 2)
+        leads = self.env['crm.lead'].search([('indiamart_unique_id', '=like', f"{self.mock.batch_prefix}%")])
+        self.assertEqual(leads.filtered(lambda lead: lead.contact_name == 'Buyer 1').partner_id, by_email)
+        self.assertEqual(leads.filtered(lambda lead: lead.contact_name == 'Buyer 2').partner_id, by_phone)
+        self.assertFalse(leads.filtered(lambda lead: lead.contact_name == 'Buyer 3').partner_id)
+
+    def test_inquiry_data_is_searchable(self):
+        self.mock.reset(total=4)
+        self.settings._run_ingestion(is_manual=True)
+        leads = self.env['crm.lead'].search([('indiamart_unique_id', '=like', f"{self.mock.batch_prefix}%")])
+        lead = leads[:1]
+        self.assertEqual(lead.inquiry_data['source'], 'IndiaMART')
+        self.assertIn(f"Product: {lead.inquiry_product}", lead.description)
+        by_category = self.env['crm.lead'].search([
+            ('id', 'in', leads.ids), ('inquiry_category', '=', lead.inquiry_category),
+        ])
+        self.assertEqual(by_category, leads.filtered(lambda other: other.inquiry_category == lead.inquiry_category))
+
+    def test_lead_analysis_is_incremental(self):
+        Report = self.env['lead.ingestion.report']
+        today = fields.Datetime.context_timestamp(Report.with_context(tz=Report._report_tz()), fields.Datetime.now()).date()
+        domain = [('day', '=', today), ('source_name', '=', 'IndiaMART')]
+        before = sum(Report.search(domain).mapped('lead_count'))
+        self.mock.reset(total=6)
+        stats = self.settings._run_ingestion(is_manual=True)
+        self.assertEqual(sum(Report.search(domain).mapped('lead_count')), before + stats['created'])
+
+        # The rebuild from crm_lead finds the same cells
+        cells = {(row.category, row.state_id, row.query_type): row.lead_count for row in Report.search(domain)}
+        Report._rebuild(today)
+        self.assertEqual({(row.category, row.state_id, row.query_type): row.lead_count for row in Report.search(domain)}, cells)
+
+    def test_failure_payload_is_logged(self):
+        self.mock.reset(total=5, failure='indiamart')
+        stats = self.settings._run_ingestion(is_manual=False)
+        self.assertIn('advised to hit this API', stats['error'])
+        self.assertEqual(self.last_log().status, 'failure')
+        self.assertEqual(self.count_leads(), 0)
+
+    def test_database_error_is_logged(self):
+        '''A failed query aborts the transaction: the log is still written'''
+        self.mock.reset(total=5)
+        Inquiry = type(self.env['lead.ingestion.inquiry'])
+
+        def stage(inquiry, *args, **kwargs):
+            inquiry.env.cr.execute("SELECT 1 / 0")
+
+        with patch.object(Inquiry, '_stage', stage), mute_logger('odoo.sql_db'):
+            stats = self.settings._run_ingestion(is_manual=False)
+        self.assertIn('division by zero', stats['error'])
+        log = self.last_log()
+        self.assertEqual(log.status, 'failure')
+        self.assertIn('division by zero', log.response_message)
+
+    def test_overlapping_run_is_skipped(self):
+        self.mock.reset(total=5)
+        # Another worker is fetching the same account: a connection of its
+        # own, the advisory lock is reentrant within one session
+        with db_connect(self.env.cr.dbname).cursor() as other_cr:
+            other_cr.execute("SELECT pg_advisory_lock(%s, %s)", self.settings._ingestion_lock_key())
+            requests_before = len(self.mock.requests)
+            admin_settings = self.settings.with_user(self.env.ref('base.user_admin')).sudo(False)
+            stats = admin_settings._run_ingestion(is_manual=True)
+            self.assertTrue(stats['skipped'])
+            self.assertEqual(len(self.mock.requests), requests_before)
+            self.assertEqual(self.last_log().status, 'skipped')
+            other_cr.execute("SELECT pg_advisory_unlock(%s, %s)", self.settings._ingestion_lock_key())
+
+        stats = self.settings._run_ingestion(is_manual=True)
+        self.assertFalse(stats['skipped'])
+        self.assertEqual(self.count_leads(), 5)
+
+    def test_adaptive_polling_backs_off_when_throttled(self):
+        self.mock.reset(total=5, failure='indiamart')
+        self.settings.write({'adaptive_polling': True, 'next_poll_time': False, 'poll_throttle_count': 0})
+        self.settings._run_scheduled_fetch()
+        self.assertEqual(self.settings.poll_throttle_count, 1)
+        first_wait = self.settings.next_poll_time - self.settings.last_api_call
+        self.assertGreaterEqual(first_wait, timedelta(minutes=10))
+
+        # Not due yet: no call
+        requests_before = len(self.mock.requests)
+        self.settings._run_scheduled_fetch()
+        self.assertEqual(len(self.mock.requests), requests_before)
+
+        # Due, and past the 5 minutes between two API calls
+        self.settings.write({
+            'next_poll_time': fields.Datetime.now() - timedelta(minutes=1),
+            'last_api_call': fields.Datetime.now() - timedelta(minutes=6),
+        })
+        self.settings._run_scheduled_fetch()
+        self.assertEqual(self.settings.poll_throttle_count, 2)
+        self.assertGreater(self.settings.next_poll_time - self.settings.last_api_call, first_wait)
+
+        self.mock.reset(total=5)
+        self.settings.write({
+            'next_poll_time': fields.Datetime.now() - timedelta(minutes=1),
+            'last_api_call': fields.Datetime.now() - timedelta(minutes=6),
+        })
+        self.settings._run_scheduled_fetch()
+        self.assertEqual(self.settings.poll_throttle_count, 0)
+        self.assertGreaterEqual(self.settings.next_poll_time - self.settings.last_api_call, timedelta(minutes=5))
+
+    def test_api_call_interval_applies_to_every_account(self):
+        self.mock.reset(total=5)
+        self.settings.write({'adaptive_polling': False, 'last_api_call': fields.Datetime.now() - timedelta(minutes=1)})
+        # Woken up for another account: this one was called a minute ago
+        self.env['lead.ingestion.source.mixin']._cron_fetch_all()
+        self.assertFalse(self.mock.requests)
+
+        self.settings.last_api_call = fields.Datetime.now() - timedelta(minutes=6)
+        self.env['lead.ingestion.source.mixin']._cron_fetch_all()
+        self.assertEqual(len(self.mock.requests), 1)
+
+    def test_fetch_all_accounts(self):
+        self.mock.reset(total=5)
+        second = self.settings.copy({'name': 'Second Seller', 'api_key': 'mock-key-2'})
+        (self.settings | second).write({'adaptive_polling': True, 'next_poll_time': False})
+        self.env['lead.ingestion.source.mixin']._cron_fetch_all()
+        keys = {params.get('glusr_crm_key') for _path, params in self.mock.requests}
+        self.assertEqual(keys, {'mock-key', 'mock-key-2'})
+        logs = self.env['indiamart.api.log'].search([('source_res_id', 'in', (self.settings | second).ids)])
+        self.assertEqual(set(logs.mapped('account_name')), {self.settings.name, 'Second Seller'})
+        self.assertTrue(second.next_poll_time, "Every account has its own poll schedule")
+
+        # Not due: none of them is called again
+        requests_before = len(self.mock.requests)
+        self.env['lead.ingestion.source.mixin']._cron_fetch_all()
+        self.assertEqual(len(self.mock.requests), requests_before)
+
+    def test_fetch_account_thread(self):
+        '''The task of a fetch worker thread: its own cursor and environment'''
+        self.mock.reset(total=5)
+        Mixin = self.env['lead.ingestion.source.mixin']
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            stats = executor.submit(Mixin._ingestion_fetch_account_thread, self.settings._name, self.settings.id).result()
+        self.assertEqual(stats['fetched'], 5)
+        self.assertFalse(stats['error'])
+        self.env.invalidate_all()
+        self.assertEqual(self.last_log().leads_fetched, 5)
+
+    def test_replay_archived_payload(self):
+        self.mock.reset(total=10)
+        self.settings._run_ingestion(is_manual=True)
+        log = self.last_log()
+        self.env['crm.lead'].search([('indiamart_unique_id', '=like', f"{self.mock.batch_prefix}%")]).unlink()
+
+        requests_before = len(self.mock.requests)
+        log.action_replay()
+        self.assertEqual(len(self.mock.requests), requests_before, "A replay never calls the API")
+        self.assertEqual(self.count_leads(), 10)
+        self.assertTrue(self.last_log().is_replay)
+
+    def test_streamed_and_buffered_responses(self):
+        for stream in (True, False):
+            with self.subTest(stream=stream):
+                self.mock.reset(total=20)
+                self.settings.write({'stream_responses': stream, 'batch_size': 7})
+                stats = self.settings._run_ingestion(is_manual=True)
+                self.assertEqual(stats['created'], 20)
+                self.assertGreater(self.last_log().response_bytes, 0)
+
+    def test_bad_rows_are_bisected_out(self):
+        self.env['crm.lead'].create({'name': 'Existing', 'indiamart_unique_id': 'BISECT-7'})
+        vals_list = [
+            {'name': f"Lead {index}", 'type': 'lead', 'indiamart_unique_id': f"BISECT-{index}"}
+            for index in range(10)
+        ]
+        vals_list[4]['probability'] = 150
+        self.settings.batch_size = 10
+        created, duplicates, failures = self.settings._create_leads_batched(vals_list)
+        self.assertEqual(len(created), 8)
+        self.assertEqual([vals['indiamart_unique_id'] for vals in duplicates], ['BISECT-7'])
+        self.assertEqual([vals['indiamart_unique_id'] for vals, _error in failures], ['BISECT-4'])
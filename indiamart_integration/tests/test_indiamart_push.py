@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+# FILE: indiamart_integration/tests/test_indiamart_push.py
+
+import json
+from datetime import datetime
+from odoo.tests import HttpCase, tagged
+from odoo.addons.lead_ingestion_core.tests.mock_marketplace import indiamart_record
+
+
+@tagged('post_install', '-at_install')
+class TestIndiaMARTPush(HttpCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.settings = cls.env.ref('indiamart_integration.indiamart_settings_default')
+        cls.settings.push_enabled = True
+        cls.settings.action_generate_push_token()
+
+    def push(self, payload, token=None):
+        return self.url_open(
+            f"/lead_ingestion/push/indiamart/{token or self.settings.push_token}",
+            data=json.dumps(payload),
+            headers={'Content-Type': 'application/json'},
+        )
+
+    def test_push_creates_lead(self):
+        record = indiamart_record('PUSH', 1, datetime.now())
+        response = self.push({'CODE': 200, 'STATUS': 'SUCCESS', 'RESPONSE': record})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['created'], 1)
+        lead = self.env['crm.lead'].search([('indiamart_unique_id', '=', record['UNIQUE_QUERY_ID'])])
+        self.assertEqual(lead.email_from, record['SENDER_EMAIL'])
+        self.assertEqual(lead.create_uid, self.env.ref('base.user_root'), "Not created by the public user")
+        log = self.env['indiamart.api.log'].search([], order='id desc', limit=1)
+        self.assertTrue(log.is_push)
+        self.assertEqual(log.leads_created, 1)
+
+        # Pushed again, or fetched later by the pull API: no second lead
+        self.assertEqual(self.push({'RESPONSE': record}).json()['duplicates'], 1)
+        staged = self.env['lead.ingestion.inquiry']._stage(self.settings, [record], log)
+        self.assertFalse(staged)
+
+    def test_push_rejects_unknown_token(self):
+        response = self.push({'RESPONSE': indiamart_record('PUSH', 2, datetime.now())}, token='wrong')
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(self.env['crm.lead'].search([('indiamart_unique_id', '=', 'PUSH00000002')]))
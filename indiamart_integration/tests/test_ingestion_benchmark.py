@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+# FILE: indiamart_integration/tests/test_ingestion_benchmark.py
+'''Throughput benchmarks, not part of the regular test run:
+
+    odoo-bin -d bench -i indiamart_integration --test-tags lead_ingestion_benchmark --stop-after-init
+
+Sizes can be narrowed with LEAD_INGESTION_BENCHMARK_SIZES=100,10000.
+'''
+
+from datetime import datetime, timedelta
+from odoo.tests import tagged
+from .common import IndiaMARTCase
+
+
+@tagged('-standard', 'post_install', '-at_install', 'lead_ingestion_benchmark')
+class TestIndiaMARTIngestionBenchmark(IndiaMARTCase):
+
+    def test_scheduled_fetch(self):
+        Inquiry = self.env['lead.ingestion.inquiry']
+        for size in self.benchmark_sizes():
+            with self.subTest(size=size):
+                self.mock.reset(total=size)
+
+                def run():
+                    # One size after the other, not 5 minutes apart
+                    self.settings.last_api_call = False
+                    self.settings._run_scheduled_fetch()
+                    Inquiry._cron_process_pending()
+
+                report = self.run_benchmark('IndiaMART scheduled fetch', size, run, 'indiamart_unique_id')
+                self.assertEqual(report['created'], size)
+
+    def test_wizard_fetch(self):
+        for size in self.benchmark_sizes():
+            with self.subTest(size=size):
+                self.mock.reset(total=size)
+                wizard = self.env['indiamart.fetch.leads.wizard'].create({
+                    'start_time': datetime.now() - timedelta(days=1),
+                    'end_time': datetime.now(),
+                })
+                report = self.run_benchmark('IndiaMART wizard fetch', size, wizard.action_fetch_leads, 'indiamart_unique_id')
+                self.assertEqual(report['created'], size)
@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+from . import controllers
+from . import models
+
+
+def _post_init_hook(env):
+    '''Fill the lead analysis with the leads already ingested'''
+    env['lead.ingestion.report']._rebuild()
@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+{
+    'name': 'Lead Ingestion Core',
+    'version': '19.0.1.2.0',
+    'summary': 'Shared building blocks for marketplace lead integrations (IndiaMART, TradeIndia).',
+    'author': 'Rohitkumar Singh',
+    'category': 'Sales/CRM',
+    'depends': [
+        'crm',
+    ],
+    'data': [
+        'security/ir.model.access.csv',
+        'data/lead_ingestion_cron.xml',
+        'views/lead_ingestion_inquiry_views.xml',
+        'views/lead_ingestion_log_daily_views.xml',
+        'views/crm_lead_views.xml',
+        'views/lead_ingestion_report_views.xml',
+    ],
+    'post_init_hook': '_post_init_hook',
+    'installable': True,
+    'application': False,
+    'auto_install': False,
+}
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+# FILE: lead_ingestion_core/controllers/main.py
+
+import logging
+from odoo import SUPERUSER_ID, http
+from odoo.http import request
+
+_logger = logging.getLogger(__name__)
+
+# Largest pushed document accepted, in bytes
+MAX_PUSH_SIZE = 5 * 1024 * 1024
+
+
+class LeadIngestionPushController(http.Controller):
+
+    @http.route('/lead_ingestion/push/<string:source>/<string:token>', type='http', auth='public',
+                methods=['POST'], csrf=False, save_session=False)
+    def push(self, source, token, **kwargs):
+        '''Inquiries posted by a marketplace (e.g. the IndiaMART Push API).
+
+        The token of the URL identifies and authenticates the account
+        (settings form, Push URL). The JSON body goes through the account's
+        _ingestion_push_records() and the regular staging pipeline.
+
+            curl -X POST -H 'Content-Type: application/json' -d @inquiry.json <Push URL>
+
+        Ingestion runs as the superuser (OdooBot), like the scheduled fetch,
+        not as the public user: leads, contacts and chatter are theirs.
+        '''
+        Source = request.env['lead.ingestion.source.mixin'].with_user(SUPERUSER_ID)
+        account = Source._ingestion_push_account(source, token)
+        if not account:
+            return request.make_json_response({'status': 'error', 'message': "Unknown push URL"}, status=403)
+        if (request.httprequest.content_length or 0) > MAX_PUSH_SIZE:
+            return request.make_json_response({'status': 'error', 'message': "Payload too large"}, status=413)
+        try:
+            data = request.get_json_data()
+        except ValueError:
+            return request.make_json_response({'status': 'error', 'message': "Invalid JSON"}, status=400)
+
+        records = account._ingestion_push_records(data)
+        if not records:
+            return request.make_json_response({'status': 'error', 'message': "No inquiry in payload"}, status=400)
+        stats = account._ingestion_push(records)
+        return request.make_json_response({
+            'status': 'ok',
+            'received': stats['fetched'],
+            'created': stats['created'],
+            'duplicates': stats['duplicates'],
+            'queued': stats['queued'],
+        })
@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+from odoo import api, SUPERUSER_ID
+
+
+def migrate(cr, version):
+    '''Fill the lead analysis with the leads ingested before it existed'''
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env['lead.ingestion.report']._rebuild()
@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+from . import res_country
+from . import crm_lead
+from . import res_partner
+from . import lead_ingestion_log
+from . import lead_ingestion_log_daily
+from . import lead_ingestion_report
+from . import lead_ingestion_source
+from . import lead_ingestion_inquiry
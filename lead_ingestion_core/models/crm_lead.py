@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+# FILE: lead_ingestion_core/models/crm_lead.py
+
+import json
+from odoo import api, fields, models
+from odoo.exceptions import UserError
+from odoo.tools import SQL, email_normalize
+from odoo.addons.iap.tools import iap_tools
+
+# Same limits as crm's potential duplicates
+MIN_NAME_LENGTH = 6
+SEARCH_RESULT_LIMIT = 21
+
+
+class CrmLead(models.Model):
+    '''Normalized contact keys, matched by equality on an index:
+
+    * phone_sanitized (mail.thread.phone): the phone in E.164
+    * email_normalized (mail.thread.blacklist): lower-cased local@domain
+    * email_domain: lower-cased domain of email_normalized
+    '''
+    _inherit = 'crm.lead'
+
+    email_domain = fields.Char(
+        string="Email Domain",
+        compute='_compute_email_domain',
+        store=True,
+        index='btree_not_null',
+    )
+    # Normalized marketplace inquiry (source, product, category, subject,
+    # message, query_type, query_time, ...), the description is rendered from it
+    inquiry_data = fields.Json(string="Inquiry Data", readonly=True, copy=False)
+    inquiry_product = fields.Char(
+        string="Inquiry Product", compute='_compute_inquiry_keys', search='_search_inquiry_product')
+    inquiry_category = fields.Char(
+        string="Inquiry Category", compute='_compute_inquiry_keys', search='_search_inquiry_category')
+
+    # email_normalized only has a trigram index, no use for = and IN lookups
+    _email_normalized_lookup_idx = models.Index('(email_normalized) WHERE email_normalized IS NOT NULL')
+    # Containment (@>) lookups on any inquiry key, e.g. inquiry_category = X
+    _inquiry_data_gin_idx = models.Index('USING gin (inquiry_data jsonb_path_ops)')
+    # Day range scans of lead.ingestion.report._rebuild
+    _inquiry_create_date_idx = models.Index('(create_date) WHERE inquiry_data IS NOT NULL')
+
+    @api.depends('email_normalized')
+    def _compute_email_domain(self):
+        for lead in self:
+            lead.email_domain = lead.email_normalized.rpartition('@')[2] if lead.email_normalized else False
+
+    @api.depends('inquiry_data')
+    def _compute_inquiry_keys(self):
+        for lead in self:
+            data = lead.inquiry_data if isinstance(lead.inquiry_data, dict) else {}
+            lead.inquiry_product = data.get('product') or False
+            lead.inquiry_category = data.get('category') or False
+
+    def _search_inquiry_product(self, operator, value):
+        return self._search_inquiry_key('product', operator, value)
+
+    def _search_inquiry_category(self, operator, value):
+        return self._search_inquiry_key('category', operator, value)
+
+    def _search_inquiry_key(self, key, operator, value):
+        '''Domain on one key of inquiry_data. Equality becomes a jsonb
+        containment test, served by the GIN index.'''
+        if operator in ('=', '!=', 'in', 'not in'):
+            values = [value] if operator in ('=', '!=') else list(value)
+            positive = operator in ('=', 'in')
+            if not values:
+                return [('id', '=', False)] if positive else []
+            conditions = [SQL("inquiry_data @> %s::jsonb", json.dumps({key: item})) for item in values if item]
+            if len(conditions) < len(values):
+                # = False: leads without this key
+                conditions.append(SQL("inquiry_data->>%s IS NULL", key))
+            lead_ids = SQL("SELECT id FROM crm_lead WHERE %s", SQL(" OR ").join(conditions))
+            return [('id', 'in' if positive else 'not in', lead_ids)]
+        if operator in ('ilike', 'not ilike'):
+            lead_ids = SQL("SELECT id FROM crm_lead WHERE inquiry_data->>%s ILIKE %s", key, f"%{value}%")
+            return [('id', 'in' if operator == 'ilike' else 'not in', lead_ids)]
+        raise UserError(f"Unsupported search on the inquiry {key}: {operator}")
+
+    @api.depends('email_from', 'phone', 'partner_id', 'contact_name', 'partner_name')
+    def _compute_potential_lead_duplicates(self):
+        '''crm's potential duplicates (same search environment, company
+        scope and limits), with the email and phone matched by equality on
+        the normalized keys instead of ilike scans of email_normalized: same
+        company domain (the same address for mail providers) or same E.164
+        phone.'''
+        def return_if_relevant(domain):
+            # As crm: every lead, archived or not, whatever the record rules
+            Lead = self.env['crm.lead'].sudo().with_context(active_test=False)
+            leads = Lead.search_fetch(domain, ['id'], limit=SEARCH_RESULT_LIMIT)
+            return leads if len(leads) < SEARCH_RESULT_LIMIT else Lead
+
+        for lead in self:
+            lead_id = lead._origin.id if isinstance(lead.id, models.NewId) else lead.id
+            common_domain = [('id', '!=', lead_id)]
+            if lead.company_id:
+                common_domain += [('company_id', 'in', [lead.company_id.id, False])]
+            duplicates = self.env['crm.lead']
+
+            if lead.email_domain and lead.email_domain not in iap_tools._MAIL_PROVIDERS:
+                duplicates |= return_if_relevant(common_domain + [('email_domain', '=', lead.email_domain)])
+            elif lead.email_normalized:
+                duplicates |= return_if_relevant(common_domain + [('email_normalized', '=', lead.email_normalized)])
+            if lead.phone_sanitized:
+                duplicates |= return_if_relevant(common_domain + [('phone_sanitized', '=', lead.phone_sanitized)])
+            if lead.partner_name and len(lead.partner_name) >= MIN_NAME_LENGTH:
+                duplicates |= return_if_relevant(common_domain + [('partner_name', 'ilike', lead.partner_name)])
+            if lead.contact_name and len(lead.contact_name) >= MIN_NAME_LENGTH:
+                duplicates |= return_if_relevant(common_domain + [('contact_name', 'ilike', lead.contact_name)])
+            if lead.partner_id.commercial_partner_id:
+                duplicates |= lead.with_context(active_test=False).search(common_domain + [
+                    ('partner_id', 'child_of', lead.partner_id.commercial_partner_id.id),
+                ])
+
+            lead.duplicate_lead_ids = duplicates + lead
+            lead.duplicate_lead_count = len(duplicates)
+
+    @api.model
+    def _contact_keys(self, email, phone, country=None):
+        '''(email_normalized, phone_sanitized) a lead with this email and
+        phone would get, computed without creating it'''
+        email_key = email_normalize(email) if email else False
+        phone_key = self._phone_format(number=phone, country=country or self.env.company.country_id) if phone else False
+        return email_key or False, phone_key or False
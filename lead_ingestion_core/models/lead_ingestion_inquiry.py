@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+# FILE: lead_ingestion_core/models/lead_ingestion_inquiry.py
+
+import json
+import logging
+import time
+from datetime import timedelta
+from odoo import api, fields, models
+
+_logger = logging.getLogger(__name__)
+
+# Processed inquiries are kept this long for troubleshooting
+PROCESSED_RETENTION_DAYS = 30
+
+class LeadIngestionInquiry(models.Model):
+    '''Raw marketplace inquiry waiting for (or done with) lead creation.
+
+    Fetches only append here and commit, the processing job turns pending
+    rows into leads in batches. Whatever happens after a fetch, the inquiry
+    is on disk and will be processed.
+    '''
+    _name = 'lead.ingestion.inquiry'
+    _description = 'Staged Marketplace Inquiry'
+    _order = 'id desc'
+
+    source_model = fields.Char(string="Source", required=True, readonly=True, index=True)
+    source_res_id = fields.Many2oneReference(string="Account", model_field='source_model', readonly=True)
+    unique_id = fields.Char(string="Inquiry ID", readonly=True)
+    payload = fields.Json(string="Raw Inquiry", readonly=True)
+    payload_text = fields.Text(string="Raw Inquiry (JSON)", compute='_compute_payload_text')
+    state = fields.Selection(
+        [
+            ('pending', 'Pending'),
+            ('done', 'Lead Created'),
+            ('duplicate', 'Duplicate'),
+            ('failed', 'Failed'),
+        ],
+        string="Status",
+        default='pending',
+        required=True,
+        readonly=True,
+        index=True
+    )
+    error = fields.Text(string="Error", readonly=True)
+    lead_id = fields.Many2one('crm.lead', string="Lead", readonly=True, ondelete='set null')
+    log_model = fields.Char(string="Log Model", readonly=True)
+    log_id = fields.Many2oneReference(string="API Log", model_field='log_model', readonly=True)
+    processed_date = fields.Datetime(string="Processed On", readonly=True)
+
+    # Repeated fetches of the same inquiry never stage it twice
+    _source_unique_id_uniq = models.Constraint(
+        'UNIQUE(source_model, unique_id)',
+        "This inquiry is already staged.",
+    )
+
+    def _compute_payload_text(self):
+        for inquiry in self:
+            inquiry.payload_text = json.dumps(inquiry.payload, indent=2, ensure_ascii=False) if inquiry.payload else False
+
+    # ------------------------------------------------------------
+    # Staging
+    # ------------------------------------------------------------
+
+    @api.model
+    def _stage(self, settings, raw_records, log, requeue=False):
+        '''Append the raw records of one account with a single INSERT.
+
+        Inquiries already staged are left alone (ON CONFLICT), except failed
+        ones, and all of them when requeue is set (manual fetches report on
+        every record they fetched). Records without an ID are kept as failed.
+        Returns the inquiries inserted or requeued.
+        '''
+        if not raw_records:
+            return self.browse()
+        rows = []
+        seen = set()
+        for raw in raw_records:
+            try:
+                unique_id = settings._ingestion_raw_unique_id(raw)
+            except Exception:
+                unique_id = None
+            # ON CONFLICT cannot touch the same row twice in one statement
+            if unique_id and unique_id in seen:
+                continue
+            seen.add(unique_id)
+            rows.append((
+                settings._name, settings.id, unique_id or None, json.dumps(raw),
+                'pending' if unique_id else 'failed', None if unique_id else 'Missing ID',
+                log._name, log.id, self.env.uid, self.env.uid,
+            ))
+        values = ", ".join(
+            ["(%s, %s, %s, %s::jsonb, %s, %s, %s, %s, %s, now() at time zone 'UTC', %s, now() at time zone 'UTC')"] * len(rows)
+        )
+        self.env.cr.execute(f"""
+            INSERT INTO lead_ingestion_inquiry
+                   (source_model, source_res_id, unique_id, payload, state, error,
+                    log_model, log_id, create_uid, create_date, write_uid, write_date)
+            VALUES {values}
+            ON CONFLICT (source_model, unique_id) DO UPDATE
+               SET payload = EXCLUDED.payload, state = 'pending', error = NULL,
+                   log_model = EXCLUDED.log_model, log_id = EXCLUDED.log_id,
+                   write_date = EXCLUDED.write_date
+             WHERE lead_ingestion_inquiry.state = 'failed' OR %s
+            RETURNING id
+        """, [value for row in rows for value in row] + [requeue])
+        return self.browse([row[0] for row in self.env.cr.fetchall()])
+
+    # ------------------------------------------------------------
+    # Processing
+    # ------------------------------------------------------------
+
+    def _process(self, stats=None, fast=False):
+        '''Turn the pending inquiries of self into leads, one ingestion batch
+        per account, and store every record's outcome.
+
+        fast is passed on to _ingest_records (fast ingest of the account).
+        Without stats (the processing job) the created leads, the time spent
+        and the queries are added to the API log records of the fetches that
+        staged the inquiries.
+        '''
+        update_logs = stats is None
+        if stats is None:
+            stats = self.env['lead.ingestion.source.mixin']._ingestion_new_stats()
+        started = time.perf_counter()
+        queries_before = self.env.cr.sql_log_count
+        pending = self.filtered(lambda inquiry: inquiry.state == 'pending')
+        results = []
+        for (source_model, res_id), inquiries in pending.grouped(lambda inquiry: (inquiry.source_model, inquiry.source_res_id)).items():
+            settings = self.env[source_model].browse(res_id).exists()
+            if not settings:
+                results += [(inquiry.id, 'failed', None, "Account deleted") for inquiry in inquiries]
+                continue
+            outcomes = settings._ingest_records(inquiries.mapped('payload'), stats, fast=fast)
+            for inquiry in inquiries:
+                state, lead_id, error = outcomes.get(inquiry.unique_id, ('failed', False, "Unreadable record"))
+                results.append((inquiry.id, state, lead_id or None, error or None))
+        self._write_outcomes(results)
+        if update_logs:
+            self._update_logs(results, stats['metrics'], time.perf_counter() - started, self.env.cr.sql_log_count - queries_before)
+        return stats
+
+    def _write_outcomes(self, results):
+        '''One UPDATE for the outcome of a whole batch'''
+        if not results:
+            return
+        values = ", ".join(["(%s, %s, %s::int, %s)"] * len(results))
+        self.env.cr.execute(f"""
+            UPDATE lead_ingestion_inquiry inquiry
+               SET state = outcome.state, lead_id = outcome.lead_id, error = outcome.error,
+                   processed_date = now() at time zone 'UTC',
+                   write_date = now() at time zone 'UTC', write_uid = %s
+              FROM (VALUES {values}) AS outcome(id, state, lead_id, error)
+             WHERE inquiry.id = outcome.id
+        """, [self.env.uid] + [value for result in results for value in result])
+        self.invalidate_model(['state', 'lead_id', 'error', 'processed_date'])
+
+    def _update_logs(self, results, metrics, elapsed, sql_queries):
+        '''Credit each originating log with its created leads and its share
+        (by inquiry count) of the processing time and queries.'''
+        created_ids = {inquiry_id for inquiry_id, state, _lead_id, _error in results if state == 'done'}
+        processed = self.browse([result[0] for result in results])
+        for (log_model, log_id), inquiries in processed.grouped(lambda inquiry: (inquiry.log_model, inquiry.log_id)).items():
+            log = self.env[log_model].sudo().browse(log_id).exists() if log_model else None
+            if not log:
+                continue
+            log.leads_created += len(set(inquiries.ids) & created_ids)
+            log._add_metrics(metrics, elapsed, sql_queries, share=len(inquiries) / len(processed))
+
+    @api.model
+    def _cron_process_pending(self, batch_size=500):
+        '''Process pending inquiries in committed batches. Rows are claimed with
+        SKIP LOCKED so several workers can share the queue.'''
+        while True:
+            self.env.cr.execute("""
+                SELECT id FROM lead_ingestion_inquiry
+                 WHERE state = 'pending'
+                 ORDER BY id
+                 LIMIT %s
+                   FOR UPDATE SKIP LOCKED
+            """, [batch_size])
+            batch = self.browse([row[0] for row in self.env.cr.fetchall()])
+            if not batch:
+                break
+            created = batch._process_isolated()
+            self.env.cr.commit()
+            _logger.info(f"Processed {len(batch)} staged inquiries: {created} leads created")
+
+    def _process_isolated(self):
+        '''Process claimed inquiries (fast ingest where enabled) in a savepoint.
+        A batch that fails is split in halves and retried (bisection), like
+        _create_leads_batched, so only the inquiries that fail on their own
+        are marked failed. The row locks are kept throughout.
+        Returns the number of leads created.'''
+        try:
+            with self.env.cr.savepoint():
+                return self._process(fast=True)['created']
+        except Exception as e:
+            if len(self) == 1:
+                _logger.error(f"✗ Processing of staged inquiry {self.unique_id} failed: {e}", exc_info=True)
+                self._write_outcomes([(self.id, 'failed', None, str(e))])
+                return 0
+            _logger.warning(f"Processing of {len(self)} staged inquiries failed ({e}), bisecting")
+            middle = len(self) // 2
+            return self[:middle]._process_isolated() + self[middle:]._process_isolated()
+
+    def action_retry(self):
+        self.filtered(lambda inquiry: inquiry.state == 'failed' and inquiry.unique_id).write({'state': 'pending', 'error': False})
+        self.env.ref('lead_ingestion_core.ir_cron_lead_ingestion_process')._trigger()
+
+    @api.autovacuum
+    def _gc_processed_inquiries(self):
+        limit = fields.Datetime.now() - timedelta(days=PROCESSED_RETENTION_DAYS)
+        self.search([('state', 'in', ('done', 'duplicate')), ('processed_date', '<', limit)]).unlink()
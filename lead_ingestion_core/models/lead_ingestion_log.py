@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+# FILE: lead_ingestion_core/models/lead_ingestion_log.py
+
+from odoo import api, fields, models
+from odoo.exceptions import UserError
+from odoo.addons.lead_ingestion_core.tools import STAGES
+
+
+class LeadIngestionLogMixin(models.AbstractModel):
+    _name = 'lead.ingestion.log.mixin'
+    _description = 'Marketplace API Call Log Mixin'
+    _order = 'request_time desc'
+
+    name = fields.Char(string="Request", compute='_compute_name', store=True)
+    # Indexed for the default order and the retention purge
+    request_time = fields.Datetime(string="Request Time", default=fields.Datetime.now, readonly=True, index=True)
+    status = fields.Selection(
+        [('success', 'Success'), ('failure', 'Failure'), ('skipped', 'Skipped')],
+        string="Status",
+        readonly=True
+    )
+    is_manual = fields.Boolean(string="Manual Fetch", readonly=True)
+    is_replay = fields.Boolean(string="Replay", readonly=True)
+    is_push = fields.Boolean(string="Pushed", readonly=True, help="Inquiries posted by the marketplace to the push endpoint.")
+    leads_fetched = fields.Integer(string="Leads Fetched", readonly=True)
+    leads_created = fields.Integer(string="Leads Created", readonly=True)
+    response_message = fields.Text(string="API Response Message", readonly=True)
+    source_model = fields.Char(string="Source", readonly=True)
+    source_res_id = fields.Many2oneReference(string="Account ID", model_field='source_model', readonly=True)
+    account_name = fields.Char(string="Account", compute='_compute_account_name')
+    raw_archive_id = fields.Many2one(
+        'ir.attachment',
+        string="Raw Payload",
+        readonly=True,
+        ondelete='set null',
+        help="Every raw record returned by the API during this call, as gzip-compressed JSON Lines."
+    )
+
+    # Performance, averaged in the pivot and graph views
+    duration_total = fields.Float(string="Total (s)", digits=(16, 3), readonly=True, aggregator='avg')
+    duration_network = fields.Float(string="Network (s)", digits=(16, 3), readonly=True, aggregator='avg')
+    duration_parse = fields.Float(string="JSON Parsing (s)", digits=(16, 3), readonly=True, aggregator='avg')
+    duration_staging = fields.Float(string="Staging (s)", digits=(16, 3), readonly=True, aggregator='avg')
+    duration_dedup = fields.Float(string="Duplicate Check (s)", digits=(16, 3), readonly=True, aggregator='avg')
+    duration_geo = fields.Float(string="Geo Lookup (s)", digits=(16, 3), readonly=True, aggregator='avg')
+    duration_partner = fields.Float(string="Partner Matching (s)", digits=(16, 3), readonly=True, aggregator='avg')
+    duration_create = fields.Float(string="Lead Creation (s)", digits=(16, 3), readonly=True, aggregator='avg')
+    http_calls = fields.Integer(string="HTTP Calls", readonly=True)
+    http_status = fields.Integer(string="HTTP Status", readonly=True, aggregator=False)
+    response_bytes = fields.Integer(string="Response Size (bytes)", readonly=True, aggregator='avg')
+    sql_queries = fields.Integer(string="SQL Queries", readonly=True, aggregator='avg')
+
+    @api.depends('request_time')
+    def _compute_name(self):
+        for log in self:
+            log.name = f"Log @ {log.request_time}"
+
+    @api.depends('source_model', 'source_res_id')
+    def _compute_account_name(self):
+        for log in self:
+            account = log.source_model and log.source_res_id and self.env[log.source_model].browse(log.source_res_id).exists()
+            log.account_name = account.display_name if account else False
+
+    def _add_metrics(self, metrics, elapsed, sql_queries, share=1.0):
+        '''Add the processing time spent after the fetch (by the processing
+        job) to the stage durations of the call.'''
+        for log in self:
+            vals = {
+                f'duration_{stage}': log[f'duration_{stage}'] + metrics.durations[stage] * share
+                for stage in STAGES
+            }
+            vals['duration_total'] = log.duration_total + elapsed * share
+            vals['sql_queries'] = log.sql_queries + round(sql_queries * share)
+            log.write(vals)
+
+    def action_replay(self):
+        '''Run the archived payload of this call through the ingestion
+        pipeline again, without calling the API.'''
+        self.ensure_one()
+        if not self.raw_archive_id:
+            raise UserError("No raw payload was archived for this call.")
+        settings = self.env[self.source_model].browse(self.source_res_id).exists() if self.source_model else None
+        if not settings:
+            raise UserError("The account of this call no longer exists.")
+        stats = settings._ingestion_replay(self.raw_archive_id.raw)
+        return settings._ingestion_notification(stats)
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+# FILE: lead_ingestion_core/models/lead_ingestion_log_daily.py
+
+import logging
+from datetime import datetime, time, timedelta
+import pytz
+from odoo import api, fields, models
+
+_logger = logging.getLogger(__name__)
+
+# Detailed log rows deleted per transaction, and transactions per cron run
+PURGE_BATCH_SIZE = 1000
+MAX_PURGE_BATCHES = 50
+
+
+class LeadIngestionLogDaily(models.Model):
+    '''One row per source and day, compacted from the detailed API call logs
+    once they are older than the account's log retention.'''
+    _name = 'lead.ingestion.log.daily'
+    _description = 'Marketplace API Calls per Day'
+    _order = 'day desc'
+    _rec_name = 'day'
+
+    log_model = fields.Char(string="Log Model", required=True, readonly=True, index=True)
+    source_name = fields.Char(string="Source", readonly=True)
+    day = fields.Date(
+        string="Day",
+        required=True,
+        readonly=True,
+        help="Day of the API calls in the report timezone (lead_ingestion_core.report_tz), like the lead analysis.",
+    )
+    calls = fields.Integer(string="API Calls", readonly=True)
+    failures = fields.Integer(string="Failed Calls", readonly=True)
+    skipped_calls = fields.Integer(string="Skipped Runs", readonly=True)
+    manual_calls = fields.Integer(string="Manual Fetches", readonly=True)
+    leads_fetched = fields.Integer(string="Leads Fetched", readonly=True)
+    leads_created = fields.Integer(string="Leads Created", readonly=True)
+    duration_avg = fields.Float(string="Avg Duration (s)", digits=(16, 3), readonly=True, aggregator='avg')
+    duration_p50 = fields.Float(string="Median Duration (s)", digits=(16, 3), readonly=True, aggregator='avg')
+    duration_p95 = fields.Float(string="P95 Duration (s)", digits=(16, 3), readonly=True, aggregator='avg')
+    duration_max = fields.Float(string="Max Duration (s)", digits=(16, 3), readonly=True, aggregator='max')
+    sql_queries = fields.Integer(string="SQL Queries", readonly=True)
+    response_bytes = fields.Float(string="Response Size (bytes)", readonly=True)
+
+    _log_model_day_uniq = models.Constraint(
+        'UNIQUE(log_model, day)',
+        "A day is compacted only once per source.",
+    )
+
+    @api.model
+    def _cron_compact_logs(self):
+        '''Roll up and purge the API logs of every source past its retention'''
+        tz = pytz.timezone(self.env['lead.ingestion.report']._report_tz())
+        today = fields.Datetime.now().replace(tzinfo=pytz.utc).astimezone(tz).date()
+        done = True
+        for model_name in self.env['lead.ingestion.source.mixin']._ingestion_source_models():
+            Settings = self.env[model_name]
+            if not Settings._ingestion_log_model:
+                continue
+            retention_days = max(Settings.search([]).mapped('log_retention_days') or [0])
+            if retention_days <= 0:
+                continue
+            cutoff = self._local_midnight(today - timedelta(days=retention_days), tz)
+            self._rollup_logs(Settings._ingestion_log_model, Settings._ingestion_source_name, cutoff)
+            self.env.cr.commit()
+            done = self._purge_logs(Settings._ingestion_log_model, cutoff) and done
+        if not done:
+            self.env.ref('lead_ingestion_core.ir_cron_lead_ingestion_compact_logs')._trigger()
+
+    @api.model
+    def _local_midnight(self, day, tz):
+        '''Start of the local day as the naive UTC datetime the logs store'''
+        return tz.localize(datetime.combine(day, time.min)).astimezone(pytz.utc).replace(tzinfo=None)
+
+    @api.model
+    def _rollup_logs(self, log_model, source_name, cutoff):
+        '''Insert the daily rows of every whole day before cutoff (a local
+        midnight) not rolled up yet. Days are those of the report timezone,
+        as in the lead analysis. A day is compacted in one statement, so the
+        percentiles are exact; days already compacted are left alone.'''
+        table = self.env[log_model]._table
+        self.env.flush_all()
+        self.env.cr.execute(f"""
+            INSERT INTO lead_ingestion_log_daily
+                   (log_model, source_name, day, calls, failures, skipped_calls, manual_calls, leads_fetched, leads_created,
+                    duration_avg, duration_p50, duration_p95, duration_max, sql_queries, response_bytes,
+                    create_uid, create_date, write_uid, write_date)
+            SELECT %(log_model)s, %(source_name)s, (log.request_time AT TIME ZONE 'UTC' AT TIME ZONE %(tz)s)::date,
+                   count(*),
+                   count(*) FILTER (WHERE log.status = 'failure'),
+                   count(*) FILTER (WHERE log.status = 'skipped'),
+                   count(*) FILTER (WHERE log.is_manual),
+                   coalesce(sum(log.leads_fetched), 0),
+                   coalesce(sum(log.leads_created), 0),
+                   avg(log.duration_total),
+                   percentile_cont(0.5) WITHIN GROUP (ORDER BY log.duration_total),
+                   percentile_cont(0.95) WITHIN GROUP (ORDER BY log.duration_total),
+                   max(log.duration_total),
+                   coalesce(sum(log.sql_queries), 0),
+                   coalesce(sum(log.response_bytes), 0),
+                   %(uid)s, now() at time zone 'UTC', %(uid)s, now() at time zone 'UTC'
+              FROM {table} log
+             WHERE log.request_time < %(cutoff)s
+          GROUP BY (log.request_time AT TIME ZONE 'UTC' AT TIME ZONE %(tz)s)::date
+            ON CONFLICT (log_model, day) DO NOTHING
+        """, {
+            'log_model': log_model,
+            'source_name': source_name,
+            'uid': self.env.uid,
+            'cutoff': cutoff,
+            'tz': self.env['lead.ingestion.report']._report_tz(),
+        })
+        if self.env.cr.rowcount:
+            _logger.info(f"✓ Compacted {self.env.cr.rowcount} days of {source_name} API logs")
+
+    @api.model
+    def _purge_logs(self, log_model, cutoff):
+        '''Delete the detailed logs before cutoff (and their payload archives)
+        in bounded, committed batches. Returns whether everything is gone.'''
+        Log = self.env[log_model]
+        for _batch in range(MAX_PURGE_BATCHES):
+            logs = Log.search([('request_time', '<', cutoff)], order='request_time', limit=PURGE_BATCH_SIZE)
+            if not logs:
+                return True
+            logs.unlink()
+            self.env.cr.commit()
+            _logger.info(f"Purged {len(logs)} {log_model} records older than {cutoff}")
+        return not Log.search_count([('request_time', '<', cutoff)], limit=1)
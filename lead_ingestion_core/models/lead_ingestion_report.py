@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+# FILE: lead_ingestion_core/models/lead_ingestion_report.py
+
+import logging
+from datetime import timedelta
+import pytz
+from odoo import api, fields, models
+
+_logger = logging.getLogger(__name__)
+
+# Closed days recomputed from crm_lead by the nightly rebuild
+REBUILD_DAYS = 7
+# Timezone of the report days (lead_ingestion_core.report_tz system parameter)
+DEFAULT_REPORT_TZ = 'Asia/Kolkata'
+
+# Dimensions of a cube row, read from the lead's inquiry_data. The day is
+# the local date of the UTC create_date in the report timezone.
+DIMENSIONS_SQL = """
+    (lead.create_date AT TIME ZONE 'UTC' AT TIME ZONE %(tz)s)::date,
+    lead.inquiry_data->>'source',
+    coalesce(lead.inquiry_data->>'query_type', lead.inquiry_data->>'inquiry_type'),
+    lead.inquiry_data->>'category',
+    lead.country_id,
+    lead.state_id
+"""
+
+
+class LeadIngestionReport(models.Model):
+    '''Marketplace leads per day, source, query type, category and state.
+
+    A plain table kept up to date incrementally: every ingestion batch adds
+    the leads it created to their rows (an upsert of the affected cells,
+    see _add_leads), the nightly rebuild recomputes the last closed days
+    from crm_lead to account for deleted or edited leads. Installing the
+    module (post_init_hook) and the 19.0.1.2.0 upgrade rebuild every day.
+    The pivot and graph views read this table only, never crm_lead.
+    '''
+    _name = 'lead.ingestion.report'
+    _description = 'Marketplace Leads Analysis'
+    _order = 'day desc'
+    _rec_name = 'day'
+
+    day = fields.Date(
+        string="Day",
+        required=True,
+        readonly=True,
+        help="Creation date of the leads in the report timezone (lead_ingestion_core.report_tz, India by default).",
+    )
+    source_name = fields.Char(string="Source", readonly=True)
+    query_type = fields.Char(string="Query Type", readonly=True)
+    category = fields.Char(string="Category", readonly=True)
+    country_id = fields.Many2one('res.country', string="Country", readonly=True, ondelete='set null')
+    state_id = fields.Many2one('res.country.state', string="State", readonly=True, ondelete='set null')
+    lead_count = fields.Integer(string="Leads", readonly=True)
+
+    # One row per cell, NULL dimensions included: the conflict target of _add_leads
+    _cell_uniq = models.UniqueIndex("""(
+        day, coalesce(source_name, ''), coalesce(query_type, ''), coalesce(category, ''),
+        coalesce(country_id, 0), coalesce(state_id, 0)
+    )""")
+
+    @api.model
+    def _report_tz(self):
+        tz = self.env['ir.config_parameter'].sudo().get_param('lead_ingestion_core.report_tz', DEFAULT_REPORT_TZ)
+        return tz if tz in pytz.all_timezones_set else DEFAULT_REPORT_TZ
+
+    @api.model
+    def _add_leads(self, lead_ids):
+        '''Add freshly created leads to their cells, in one upsert. Concurrent
+        batches only increment the counters, so they never lose a lead.'''
+        if not lead_ids:
+            return
+        self.env.flush_all()
+        self.env.cr.execute(f"""
+            INSERT INTO lead_ingestion_report
+                   (day, source_name, query_type, category, country_id, state_id, lead_count,
+                    create_uid, create_date, write_uid, write_date)
+            SELECT {DIMENSIONS_SQL}, count(*),
+                   %(uid)s, now() at time zone 'UTC', %(uid)s, now() at time zone 'UTC'
+              FROM crm_lead lead
+             WHERE lead.id = ANY(%(lead_ids)s) AND lead.inquiry_data IS NOT NULL
+          GROUP BY {DIMENSIONS_SQL}
+            ON CONFLICT (
+                   day, coalesce(source_name, ''), coalesce(query_type, ''), coalesce(category, ''),
+                   coalesce(country_id, 0), coalesce(state_id, 0))
+            DO UPDATE SET lead_count = lead_ingestion_report.lead_count + EXCLUDED.lead_count,
+                          write_date = EXCLUDED.write_date
+        """, {'uid': self.env.uid, 'lead_ids': list(lead_ids), 'tz': self._report_tz()})
+        self.invalidate_model(['lead_count'])
+
+    @api.model
+    def _rebuild(self, date_from=None, date_to=None):
+        '''Recompute the rows of [date_from, date_to) from crm_lead, every
+        day when no bound is given'''
+        self.env.flush_all()
+        params = {'uid': self.env.uid, 'tz': self._report_tz(), 'date_from': date_from, 'date_to': date_to}
+        where = ["TRUE"]
+        if date_from:
+            where.append("%(date_from)s <= day")
+        if date_to:
+            where.append("day < %(date_to)s")
+        self.env.cr.execute(f"DELETE FROM lead_ingestion_report WHERE {' AND '.join(where)}", params)
+
+        # Local midnights as UTC timestamps, so the create_date index applies
+        lead_where = ["lead.inquiry_data IS NOT NULL"]
+        if date_from:
+            lead_where.append("lead.create_date >= (%(date_from)s::timestamp AT TIME ZONE %(tz)s) AT TIME ZONE 'UTC'")
+        if date_to:
+            lead_where.append("lead.create_date < (%(date_to)s::timestamp AT TIME ZONE %(tz)s) AT TIME ZONE 'UTC'")
+        self.env.cr.execute(f"""
+            INSERT INTO lead_ingestion_report
+                   (day, source_name, query_type, category, country_id, state_id, lead_count,
+                    create_uid, create_date, write_uid, write_date)
+            SELECT {DIMENSIONS_SQL}, count(*),
+                   %(uid)s, now() at time zone 'UTC', %(uid)s, now() at time zone 'UTC'
+              FROM crm_lead lead
+             WHERE {' AND '.join(lead_where)}
+          GROUP BY {DIMENSIONS_SQL}
+        """, params)
+        self.invalidate_model()
+        _logger.info(f"✓ Rebuilt {self.env.cr.rowcount} lead analysis rows from {date_from or 'the start'} to {date_to or 'today'}")
+
+    @api.model
+    def _cron_rebuild(self):
+        '''Recompute the last closed days. Today is left to _add_leads: the
+        ingestion batches still write to it.'''
+        today = fields.Datetime.now().replace(tzinfo=pytz.utc).astimezone(pytz.timezone(self._report_tz())).date()
+        self._rebuild(today - timedelta(days=REBUILD_DAYS), today)
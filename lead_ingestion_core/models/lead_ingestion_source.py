@@ -0,0 +1,1017 @@
+# -*- coding: utf-8 -*-
+# FILE: lead_ingestion_core/models/lead_ingestion_source.py
+
+import logging
+import secrets
+import threading
+import time
+import zlib
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
+from datetime import timedelta
+import psycopg2
+import pytz
+from markupsafe import Markup
+from psycopg2.errors import InFailedSqlTransaction, UniqueViolation
+from odoo import api, fields, models
+from odoo.exceptions import UserError
+from odoo.tools import plaintext2html
+from odoo.addons.base.models.res_partner import _tz_get
+from odoo.addons.lead_ingestion_core.tools import (
+    ARCHIVE_MIMETYPE, CHUNK_SIZE, IngestionMetrics, JsonArrayStream, PayloadArchiveWriter, iter_payload_archive,
+    minutes_until_open, poll_interval, reserve_connections, throttle_backoff,
+)
+
+_logger = logging.getLogger(__name__)
+
+# Fields a source adapter may return from _ingestion_map_record() that are
+# copied as-is onto the lead when set
+LEAD_PASSTHROUGH_FIELDS = ('partner_name', 'email_from', 'phone', 'city', 'street', 'zip')
+
+# crm.lead.create() context of fast ingest: no tracking values, creation
+# message, subscription or notification per lead (see _ingestion_post_process)
+FAST_INGEST_CONTEXT = {
+    'tracking_disable': True,
+    'mail_create_nolog': True,
+    'mail_notrack': True,
+    'mail_create_nosubscribe': True,
+    'mail_auto_subscribe_no_notify': True,
+}
+
+# Inquiries staged during this window give the arrival rate of an account
+ARRIVAL_RATE_WINDOW = timedelta(hours=2)
+# Accounts fetched at the same time by the scheduled fetch, each with its own
+# database connection (lead_ingestion_core.fetch_workers system parameter)
+DEFAULT_FETCH_WORKERS = 4
+
+
+class LeadIngestionSourceMixin(models.AbstractModel):
+    '''Fetch -> map -> deduplicate -> enrich -> create pipeline shared by the
+    marketplace integrations.
+
+    A marketplace settings model inherits this mixin, sets the class
+    attributes below and implements the adapter hooks:
+
+    * ``_ingestion_check_credentials()``: raise when the account is not set up
+    * ``_ingestion_fetch_pages(**kwargs)``: yield lists of raw API records
+    * ``_ingestion_map_record(raw)``: return the normalized record of one raw
+      record (see ``_ingestion_prepare_lead_vals`` for the keys)
+
+    Everything else (staging, batching, deduplication, geo enrichment,
+    logging and error handling) lives here, once for every source.
+    '''
+    _name = 'lead.ingestion.source.mixin'
+    _description = 'Marketplace Lead Source Mixin'
+
+    # Name of the utm.source set on created leads
+    _ingestion_source_name = None
+    # crm.lead field holding the marketplace inquiry ID
+    _ingestion_unique_field = None
+    # Model of the API call log records
+    _ingestion_log_model = None
+    # Shortest spacing between two calls accepted by the API, in minutes
+    _ingestion_min_poll_interval = 1
+    # Segment of the push endpoint /lead_ingestion/push/<source>/<token>
+    _ingestion_push_source = None
+    # (inquiry key, label) lines of the lead description, None for a blank line
+    _ingestion_description_fields = [
+        ('subject', 'Subject'), ('message', 'Message'), None,
+        ('product', 'Product'), ('category', 'Category'), ('query_time', 'Query Time'),
+    ]
+
+    batch_size = fields.Integer(
+        string="Create Batch Size",
+        default=100,
+        help="Number of leads written per crm.lead create() call during a fetch."
+    )
+    fast_ingest = fields.Boolean(
+        string="Fast Ingest",
+        default=True,
+        help="Scheduled fetches create leads without per-lead tracking and chatter work, "
+             "then log creation messages, followers and notifications for the whole batch at once."
+    )
+    stream_responses = fields.Boolean(
+        string="Stream API Responses",
+        default=True,
+        help="Parse API responses record by record while they download, so memory depends on the batch size instead of the response size."
+    )
+    log_retention_days = fields.Integer(
+        string="Keep API Logs (Days)",
+        default=90,
+        help="API logs older than this are compacted into daily statistics and deleted. 0 keeps them forever."
+    )
+    archive_payloads = fields.Boolean(
+        string="Archive Raw Payloads",
+        default=True,
+        help="Keep every raw API response as a compressed attachment of its API log, so the call can be replayed."
+    )
+    contact_dedup_hours = fields.Integer(
+        string="Merge Repeat Inquiries (Hours)",
+        default=0,
+        help="An inquiry whose buyer (same phone or email) already has a lead from this marketplace created "
+             "within this many hours is posted on that lead's chatter instead of creating another lead. "
+             "0 (default) creates a lead for every inquiry."
+    )
+    match_partners = fields.Boolean(
+        string="Link Existing Contacts",
+        default=True,
+        help="Attach new leads to the existing contact with the same email or phone."
+    )
+    adaptive_polling = fields.Boolean(
+        string="Adaptive Polling",
+        default=True,
+        help="Schedule the next fetch from the recent inquiry arrival rate and the business hours, "
+             "and back off when the API throttles. Otherwise every run of the scheduled action fetches."
+    )
+    poll_interval_min = fields.Integer(
+        string="Shortest Poll Interval (Minutes)",
+        default=5,
+        help="Polling interval during business-hour bursts. Never below the spacing required by the API."
+    )
+    poll_interval_max = fields.Integer(
+        string="Longest Poll Interval (Minutes)",
+        default=30,
+        help="Polling interval during business hours when no inquiry arrives."
+    )
+    poll_interval_off_hours = fields.Integer(
+        string="Off-Hours Poll Interval (Minutes)",
+        default=120,
+        help="Polling interval outside business hours. The first poll of the day still happens when they start."
+    )
+    business_hour_start = fields.Float(string="Business Hours From", default=9.0)
+    business_hour_end = fields.Float(string="Business Hours To", default=20.0)
+    business_tz = fields.Selection(_tz_get, string="Business Timezone", default='Asia/Kolkata', required=True)
+    push_enabled = fields.Boolean(
+        string="Accept Pushed Leads",
+        help="Turn inquiries posted by the marketplace to the Push URL into leads within seconds. "
+             "The scheduled fetch keeps running and picks up anything the push missed."
+    )
+    push_token = fields.Char(string="Push Token", readonly=True, copy=False, groups='base.group_system')
+    push_url = fields.Char(string="Push URL", compute='_compute_push_url', compute_sudo=True, groups='base.group_system')
+    next_poll_time = fields.Datetime(string="Next Poll", readonly=True, copy=False)
+    poll_throttle_count = fields.Integer(
+        string="Throttled Calls in a Row",
+        readonly=True,
+        copy=False,
+        help="Consecutive scheduled calls rejected by the API rate limit; each one doubles the wait before the next call."
+    )
+
+    @api.depends('push_token')
+    def _compute_push_url(self):
+        base_url = self.env['ir.config_parameter'].sudo().get_param('web.base.url')
+        for settings in self:
+            settings.push_url = settings.push_token and (
+                f"{base_url}/lead_ingestion/push/{settings._ingestion_push_source}/{settings.push_token}"
+            )
+
+    def action_generate_push_token(self):
+        '''New secret of the Push URL; the previous URL stops working'''
+        for settings in self:
+            settings.push_token = secrets.token_urlsafe(32)
+
+    # ------------------------------------------------------------
+    # Adapter hooks
+    # ------------------------------------------------------------
+
+    def _ingestion_check_credentials(self):
+        raise NotImplementedError()
+
+    def _ingestion_fetch_pages(self, **kwargs):
+        raise NotImplementedError()
+
+    def _ingestion_map_record(self, raw):
+        raise NotImplementedError()
+
+    def _ingestion_metrics(self):
+        '''Metrics of the running fetch, for adapters to time their network
+        calls and JSON parsing and record each API answer.'''
+        return self.env.context.get('ingestion_metrics') or IngestionMetrics()
+
+    def _ingestion_stream_pages(self, response, key=None):
+        '''Yield the records of a streamed (stream=True) JSON response in
+        pages of batch_size while it downloads: the array under `key` of the
+        top-level object, or the top-level array. Returns the other members
+        of the document, e.g. ``meta = yield from self._ingestion_stream_pages(...)``.'''
+        metrics = self._ingestion_metrics()
+        page_size = max(self.batch_size or 100, 1)
+
+        def chunks():
+            body = response.iter_content(CHUNK_SIZE)
+            while True:
+                with metrics.timed('network'):
+                    chunk = next(body, None)
+                if chunk is None:
+                    return
+                yield chunk
+
+        stream = JsonArrayStream(chunks(), key=key)
+        page = []
+        started, network = time.perf_counter(), metrics.durations['network']
+        for record in stream:
+            page.append(record)
+            if len(page) >= page_size:
+                metrics.add('parse', time.perf_counter() - started - (metrics.durations['network'] - network))
+                yield page
+                page = []
+                started, network = time.perf_counter(), metrics.durations['network']
+        metrics.add('parse', time.perf_counter() - started - (metrics.durations['network'] - network))
+        metrics.record_response(response.status_code, stream.bytes_read)
+        if page:
+            yield page
+        return stream.meta
+
+    def _ingestion_push_records(self, data):
+        '''Raw records of a pushed JSON document: a list of records or a
+        single one by default.'''
+        if isinstance(data, list):
+            return [record for record in data if isinstance(record, dict)]
+        return [data] if isinstance(data, dict) else []
+
+    def _ingestion_http_concurrency(self):
+        '''API requests one run of this account may have in flight at once'''
+        return 1
+
+    def _ingestion_raw_unique_id(self, raw):
+        '''Marketplace ID of a raw record, used to stage it. Sources with a
+        cheaper way than a full mapping may override it.'''
+        return self._ingestion_map_record(raw).get('unique_id')
+
+    # ------------------------------------------------------------
+    # Pipeline
+    # ------------------------------------------------------------
+
+    @api.model
+    def _run_scheduled_fetch(self):
+        '''Scheduled fetch of every account of this source (see _cron_fetch_all)'''
+        self._ingestion_fetch_accounts([(self._name, account_id) for account_id in self._ingestion_due_accounts().ids])
+
+    # ------------------------------------------------------------
+    # Orchestration
+    # ------------------------------------------------------------
+
+    @api.model
+    def _ingestion_source_models(self):
+        '''Names of the concrete settings models of every installed source'''
+        return [
+            model_name
+            for model_name in self.env.registry.descendants(['lead.ingestion.source.mixin'], '_inherit')
+            if not self.env[model_name]._abstract
+        ]
+
+    @api.model
+    def _ingestion_default_account(self):
+        '''The account of this source when there is exactly one'''
+        accounts = self.search([], limit=2)
+        return accounts if len(accounts) == 1 else self.browse()
+
+    @api.model
+    def _ingestion_due_accounts(self):
+        '''Accounts of this source the scheduled fetch should call now. With
+        adaptive polling, accounts whose next poll time has not come are left
+        alone until it does. No account is called before the API accepts it
+        (_ingestion_earliest_call), adaptive or not: the fetch also wakes up
+        for the poll time of any other account.'''
+        now = fields.Datetime.now()
+
+        def is_due(account):
+            if account.adaptive_polling and account.next_poll_time and account.next_poll_time > now:
+                return False
+            earliest = account._ingestion_earliest_call()
+            return not earliest or earliest <= now
+
+        return self.search([]).filtered(is_due)
+
+    @api.model
+    def _cron_fetch_all(self):
+        '''Scheduled fetch of every due account of every source'''
+        accounts = []
+        for model_name in self._ingestion_source_models():
+            accounts += [(model_name, account_id) for account_id in self.env[model_name]._ingestion_due_accounts().ids]
+        self._ingestion_fetch_accounts(accounts)
+
+    @api.model
+    def _ingestion_fetch_accounts(self, accounts):
+        '''Run the scheduled fetch of the (model name, id) accounts in a
+        bounded thread pool, so a cycle takes as long as the slowest account.
+
+        Every task has its own cursor and commits on it: the account's lock,
+        cursor/watermark fields, staged pages and API log belong to that
+        task alone. An error in one account never stops the others. With
+        lead_ingestion_core.fetch_workers set to 1 the accounts run one after
+        the other on the current cursor (what the tests use).
+        '''
+        if accounts:
+            workers = int(self.env['ir.config_parameter'].sudo().get_param(
+                'lead_ingestion_core.fetch_workers', DEFAULT_FETCH_WORKERS))
+            workers = max(min(workers, len(accounts)), 1)
+            if workers == 1:
+                # Committed per account like the threads' cursors (runs commit
+                # their pages, so a savepoint could not span one)
+                for model_name, account_id in accounts:
+                    try:
+                        self.env[model_name].browse(account_id)._ingestion_scheduled_run()
+                        self.env.cr.commit()
+                    except Exception:
+                        self.env.cr.rollback()
+                        _logger.exception(f"✗ Scheduled fetch of {model_name}({account_id}) failed")
+            else:
+                # Keep-alive for every request in flight: the busiest `workers` accounts at once
+                concurrency = sorted(
+                    (self.env[model_name].browse(account_id)._ingestion_http_concurrency() for model_name, account_id in accounts),
+                    reverse=True,
+                )
+                reserve_connections(sum(concurrency[:workers]))
+                self.env.cr.commit()
+                _logger.info(f"Fetching {len(accounts)} accounts with {workers} workers")
+                with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='lead_ingestion_fetch') as executor:
+                    futures = {
+                        executor.submit(self._ingestion_fetch_account_thread, model_name, account_id): (model_name, account_id)
+                        for model_name, account_id in accounts
+                    }
+                    for future in as_completed(futures):
+                        model_name, account_id = futures[future]
+                        try:
+                            future.result()
+                        except Exception:
+                            _logger.exception(f"✗ Scheduled fetch of {model_name}({account_id}) failed")
+        self._ingestion_trigger_next_poll()
+
+    def _ingestion_fetch_account_thread(self, model_name, account_id):
+        '''Worker thread: one account's scheduled run on a cursor of its own'''
+        threading.current_thread().dbname = self.env.cr.dbname
+        with self.env.registry.cursor() as cr:
+            env = api.Environment(cr, self.env.uid, self.env.context)
+            return env[model_name].browse(account_id)._ingestion_scheduled_run()
+
+    def _ingestion_scheduled_run(self):
+        '''One scheduled fetch of this account, then its next poll time'''
+        self.ensure_one()
+        stats = self._run_ingestion(is_manual=False)
+        if self.adaptive_polling:
+            self._ingestion_schedule_next_poll(stats)
+        return stats
+
+    def _run_ingestion(self, is_manual=False, extra_log_vals=None, process_now=None, pages=None, **fetch_kwargs):
+        '''Fetch one run into the staging queue (lead.ingestion.inquiry) and log it.
+
+        Scheduled runs commit every fetched page and leave lead creation to
+        the processing job, so nothing fetched is lost if processing fails.
+        Manual runs (and process_now=True) process each staged page at once
+        to report its outcome. Manual runs raise a UserError on failure,
+        scheduled runs only log it (stats['error']). extra_log_vals are
+        written on the API log record. Given pages (lists of raw records)
+        are ingested instead of calling the API. Returns the run statistics.
+
+        Only one run per account at a time: a run finding another one in
+        progress logs itself as skipped and returns (stats['skipped']).
+        '''
+        self.ensure_one()
+        source = self._ingestion_source_name
+        _logger.info(f"=== {source} {'Manual' if is_manual else 'Scheduled'} Fetch Started ===")
+        if process_now is None:
+            process_now = is_manual
+        Inquiry = self.env['lead.ingestion.inquiry']
+        log = self.env[self._ingestion_log_model].create(dict(
+            extra_log_vals or {},
+            is_manual=is_manual,
+            source_model=self._name,
+            source_res_id=self.id,
+        ))
+        log_vals = {}
+        stats = self._ingestion_new_stats()
+        metrics = stats['metrics']
+        archive = PayloadArchiveWriter() if pages is None and self.archive_payloads else None
+        started = time.perf_counter()
+        queries_before = self.env.cr.sql_log_count
+
+        if not self._ingestion_try_lock():
+            stats['skipped'] = True
+            summary = "Skipped: another fetch of this account is still running."
+            log.sudo().write({'status': 'skipped', 'response_message': summary})
+            _logger.info(f"» {source}: {summary}")
+            return stats
+
+        # Rolled back to after a database error, which aborts the transaction,
+        # so the failure can still be logged. Renewed after every commit.
+        savepoint = self.env.cr.savepoint()
+        try:
+            if pages is None:
+                self._ingestion_check_credentials()
+                pages = self.with_context(ingestion_metrics=metrics)._ingestion_fetch_pages(**fetch_kwargs)
+            for page in pages:
+                if archive:
+                    archive.write(page)
+                stats['fetched'] += len(page)
+                _logger.info(f"API returned {len(page)} leads")
+                with metrics.timed('staging'):
+                    inquiries = Inquiry._stage(self, page, log, requeue=is_manual)
+                # Inquiries staged by an earlier run are that run's business
+                stats['duplicates'] += len(page) - len(inquiries)
+                stats['no_id'] += len(inquiries.filtered(lambda inquiry: not inquiry.unique_id))
+                if process_now:
+                    inquiries._process(stats, fast=not is_manual)
+                else:
+                    stats['queued'] += len(inquiries.filtered('unique_id'))
+                    self.env.cr.commit()
+                    savepoint = self.env.cr.savepoint()
+            if stats['queued']:
+                self.env.ref('lead_ingestion_core.ir_cron_lead_ingestion_process')._trigger()
+
+            summary = self._ingestion_summary(stats)
+            log_vals.update({
+                'status': 'success' if stats['created'] or not is_manual else 'failure',
+                'leads_fetched': stats['fetched'],
+                'leads_created': stats['created'],
+                'response_message': summary,
+            })
+            _logger.info(f"✓ {source}: {summary}")
+            return stats
+
+        except Exception as e:
+            if isinstance(e, psycopg2.Error):
+                savepoint.rollback()
+            error_msg = str(e)
+            stats['error'] = error_msg
+            log_vals.update({
+                'status': 'failure',
+                'leads_fetched': stats['fetched'],
+                'leads_created': stats['created'],
+                'response_message': error_msg,
+            })
+            _logger.error(f"✗ {source} fetch failed: {error_msg}", exc_info=True)
+            if is_manual:
+                raise UserError(f"{source} fetch failed: {error_msg}")
+            return stats
+        finally:
+            self._ingestion_unlock()
+            if archive and archive.count:
+                log_vals['raw_archive_id'] = self._ingestion_archive_payload(log, archive).id
+            log_vals.update(metrics.log_vals(), duration_total=time.perf_counter() - started)
+            log_vals['sql_queries'] = self.env.cr.sql_log_count - queries_before
+            # API logs are read-only for users, even administrators
+            log.sudo().write(log_vals)
+
+    # ------------------------------------------------------------
+    # Push
+    # ------------------------------------------------------------
+
+    @api.model
+    def _ingestion_push_account(self, source, token):
+        '''Account accepting pushes for the URL segment `source` with this
+        token, or None'''
+        if not source or not token:
+            return None
+        for model_name in self._ingestion_source_models():
+            Settings = self.env[model_name].sudo()
+            if Settings._ingestion_push_source != source:
+                continue
+            account = Settings.search([('push_enabled', '=', True), ('push_token', '=', token)], limit=1)
+            if account and secrets.compare_digest(account.push_token, token):
+                return account
+        return None
+
+    def _ingestion_push(self, raw_records):
+        '''Stage records pushed by the marketplace and turn them into leads
+        at once. The inquiries are committed before lead creation, so if it
+        fails they are left to the processing job. Returns the run stats.'''
+        self.ensure_one()
+        source = self._ingestion_source_name
+        stats = self._ingestion_new_stats()
+        metrics = stats['metrics']
+        started = time.perf_counter()
+        log = self.env[self._ingestion_log_model].create({
+            'is_push': True,
+            'status': 'success',
+            'leads_fetched': len(raw_records),
+            'source_model': self._name,
+            'source_res_id': self.id,
+        })
+        stats['fetched'] = len(raw_records)
+        with metrics.timed('staging'):
+            inquiries = self.env['lead.ingestion.inquiry']._stage(self, raw_records, log)
+        stats['duplicates'] = len(raw_records) - len(inquiries)
+        stats['no_id'] = len(inquiries.filtered(lambda inquiry: not inquiry.unique_id))
+        log_vals = dict(metrics.log_vals(), duration_total=time.perf_counter() - started)
+        if self.archive_payloads and raw_records:
+            archive = PayloadArchiveWriter()
+            archive.write(raw_records)
+            log_vals['raw_archive_id'] = self._ingestion_archive_payload(log, archive).id
+        log.sudo().write(log_vals)
+        self.env.cr.commit()
+
+        try:
+            # Adds the created leads and the processing time to the log
+            processed = inquiries._process(fast=self.fast_ingest)
+            self.env.cr.commit()
+        except Exception as e:
+            self.env.cr.rollback()
+            stats['error'] = str(e)
+            stats['queued'] = len(inquiries.filtered('unique_id'))
+            log.sudo().response_message = f"{self._ingestion_summary(stats)}\n\nLead creation failed: {e}"
+            _logger.error(f"✗ {source} push processing failed, left to the processing job: {e}", exc_info=True)
+            self.env.ref('lead_ingestion_core.ir_cron_lead_ingestion_process')._trigger()
+            return stats
+        stats['duplicates'] += processed['duplicates']
+        stats.update(
+            created=processed['created'], failed=processed['failed'], errors=processed['errors'], partners=processed['partners'],
+        )
+        log.sudo().response_message = self._ingestion_summary(stats)
+        _logger.info(f"✓ {source} push: {stats['created']} leads created from {len(raw_records)} records")
+        return stats
+
+    # ------------------------------------------------------------
+    # Adaptive polling
+    # ------------------------------------------------------------
+
+    def _ingestion_is_throttled(self, stats):
+        '''Whether the API rejected the run for calling too often'''
+        return stats['metrics'].http_status == 429
+
+    def _ingestion_earliest_call(self):
+        '''Earliest time the API accepts the next call, if it enforces one'''
+        return None
+
+    def _ingestion_arrival_rate(self):
+        '''Inquiries staged per hour for this account, over ARRIVAL_RATE_WINDOW'''
+        count = self.env['lead.ingestion.inquiry'].sudo().search_count([
+            ('source_model', '=', self._name),
+            ('source_res_id', '=', self.id),
+            ('create_date', '>=', fields.Datetime.now() - ARRIVAL_RATE_WINDOW),
+        ])
+        return count / (ARRIVAL_RATE_WINDOW.total_seconds() / 3600)
+
+    def _ingestion_schedule_next_poll(self, stats):
+        '''Set next_poll_time from the outcome of a scheduled run'''
+        self.ensure_one()
+        now = fields.Datetime.now()
+        min_minutes = max(self.poll_interval_min, self._ingestion_min_poll_interval, 1)
+        max_minutes = max(self.poll_interval_max, min_minutes)
+        throttle_count = 0
+        if stats['skipped']:
+            delay, reason = min_minutes, "account busy"
+        elif self._ingestion_is_throttled(stats):
+            throttle_count = self.poll_throttle_count + 1
+            delay = throttle_backoff(throttle_count, min_minutes, max(self.poll_interval_off_hours, max_minutes))
+            reason = f"throttled {throttle_count}x"
+        else:
+            local_now = pytz.utc.localize(now).astimezone(pytz.timezone(self.business_tz)).replace(tzinfo=None)
+            until_open = minutes_until_open(local_now, self.business_hour_start, self.business_hour_end)
+            if until_open:
+                delay = max(min(self.poll_interval_off_hours, until_open), min_minutes)
+                reason = "off hours"
+            else:
+                rate = self._ingestion_arrival_rate()
+                delay = poll_interval(rate, min_minutes, max_minutes)
+                reason = f"{rate:.1f} inquiries/h"
+        next_poll = now + timedelta(minutes=delay)
+        earliest = self._ingestion_earliest_call()
+        if earliest and earliest > next_poll:
+            next_poll = earliest
+        self.write({'next_poll_time': next_poll, 'poll_throttle_count': throttle_count})
+        _logger.info(f"» {self._ingestion_source_name}: next poll at {next_poll} ({reason})")
+
+    @api.model
+    def _ingestion_trigger_next_poll(self):
+        '''Wake the scheduled fetch up at the earliest next poll time of all
+        accounts. Poll times already past (a run that failed before
+        scheduling its next poll) wait the minimum interval, so the fetch
+        never loops on them.'''
+        next_polls = []
+        for model_name in self._ingestion_source_models():
+            next_polls += self.env[model_name].search([
+                ('adaptive_polling', '=', True), ('next_poll_time', '!=', False),
+            ]).mapped('next_poll_time')
+        cron = self.env.ref('lead_ingestion_core.ir_cron_lead_ingestion_fetch', raise_if_not_found=False)
+        if next_polls and cron:
+            soonest = fields.Datetime.now() + timedelta(minutes=max(self._ingestion_min_poll_interval, 1))
+            cron.sudo()._trigger(at=max(min(next_polls), soonest))
+
+    # ------------------------------------------------------------
+    # Run lock
+    # ------------------------------------------------------------
+
+    def _ingestion_lock_key(self):
+        '''(source, account) key of the run lock, two int4 as PostgreSQL expects'''
+        return zlib.crc32(self._name.encode()) - 2**31, self.id
+
+    def _ingestion_try_lock(self):
+        '''Take the account's advisory lock, without waiting.
+
+        A session lock rather than a transaction lock: scheduled runs commit
+        after every page and must keep the lock until they are done.
+        '''
+        self.env.cr.execute("SELECT pg_try_advisory_lock(%s, %s)", self._ingestion_lock_key())
+        return self.env.cr.fetchone()[0]
+
+    def _ingestion_unlock(self):
+        cr = self.env.cr
+        key = self._ingestion_lock_key()
+        try:
+            cr.execute("SELECT pg_advisory_unlock(%s, %s)", key)
+        except InFailedSqlTransaction:
+            # The lock outlives the rollback: release it right after
+            cr.postrollback.add(lambda: cr.execute("SELECT pg_advisory_unlock(%s, %s)", key))
+
+    def _ingestion_archive_payload(self, log, archive):
+        # Attached to the read-only log: sudo, like the log writes
+        return self.env['ir.attachment'].sudo().create({
+            'name': f"{self._ingestion_source_name.lower()}_{log.request_time:%Y%m%d_%H%M%S}_{log.id}.jsonl.gz",
+            'raw': archive.getvalue(),
+            'mimetype': ARCHIVE_MIMETYPE,
+            'res_model': log._name,
+            'res_id': log.id,
+        })
+
+    def _ingestion_replay(self, archive_data):
+        '''Feed an archived payload (the bytes of a .jsonl.gz archive) through
+        the pipeline again, without calling the API. The replay is logged like
+        a manual run and reprocesses every inquiry.'''
+        self.ensure_one()
+        pages = iter_payload_archive(archive_data, max(self.batch_size or 100, 1))
+        return self._run_ingestion(is_manual=True, extra_log_vals={'is_replay': True}, pages=pages)
+
+    def _ingest_records(self, raw_records, stats, fast=False):
+        '''Map, deduplicate, enrich and create one batch of raw records,
+        accumulating the per-row outcome into stats. fast uses fast ingest
+        when the account allows it.
+
+        Returns {unique_id: (state, lead_id, error)} with state one of
+        'done', 'duplicate' or 'failed'.
+        '''
+        outcomes = {}
+        mapped = []
+        for raw in raw_records:
+            try:
+                record = self._ingestion_map_record(raw)
+            except Exception as e:
+                stats['failed'] += 1
+                stats['errors'].append(f"Unreadable record: {str(e)[:50]}")
+                continue
+            if not record.get('unique_id'):
+                stats['no_id'] += 1
+                stats['errors'].append(f"{record.get('contact_name')}: Missing ID")
+                _logger.warning(f"» Skipped: {record.get('contact_name')} - No unique ID")
+                continue
+            mapped.append(record)
+
+        metrics = stats['metrics']
+        # One query for every ID of the page
+        with metrics.timed('dedup'):
+            existing_ids = self._existing_unique_ids([record['unique_id'] for record in mapped])
+        source_id = self._ingestion_get_utm_source().id
+        vals_list = []
+        for record in mapped:
+            unique_id = record['unique_id']
+            if unique_id in existing_ids:
+                stats['duplicates'] += 1
+                _logger.info(f"» Duplicate: {record['contact_name']} (ID: {unique_id}) - Already exists as Lead #{existing_ids[unique_id]}")
+                outcomes[unique_id] = ('duplicate', existing_ids[unique_id] if existing_ids[unique_id] != 'pending' else False, False)
+                continue
+            existing_ids[unique_id] = 'pending'
+            vals_list.append(self._ingestion_prepare_lead_vals(record, source_id, metrics))
+        with metrics.timed('dedup'):
+            vals_list, repeats = self._ingestion_drop_contact_duplicates(vals_list, source_id, stats, outcomes)
+        if self.match_partners:
+            with metrics.timed('partner'):
+                stats['partners'] += self._ingestion_match_partners(vals_list)
+
+        field = self._ingestion_unique_field
+        with metrics.timed('create'):
+            created, duplicates, failures = self._create_leads_batched(vals_list, fast=fast and self.fast_ingest)
+        stats['created'] += len(created)
+        stats['duplicates'] += len(duplicates)
+        stats['failed'] += len(failures)
+        for new_lead in created:
+            _logger.info(f"✓ Created: {new_lead.name} (Lead ID: {new_lead.id})")
+            outcomes[new_lead[field]] = ('done', new_lead.id, False)
+        for vals in duplicates:
+            outcomes[vals[field]] = ('duplicate', False, False)
+        for vals, error in failures:
+            _logger.error(f"✗ Failed to create lead {vals[field]}: {error}")
+            stats['errors'].append(f"{vals.get('contact_name')}: {str(error)[:50]}")
+            outcomes[vals[field]] = ('failed', False, str(error))
+        if repeats:
+            self._ingestion_log_repeat_inquiries(repeats, outcomes)
+        return outcomes
+
+    def _ingestion_prepare_lead_vals(self, record, source_id, metrics=None):
+        '''crm.lead values of a normalized record. Recognized keys:
+        unique_id, name, contact_name, probability, inquiry (the normalized
+        inquiry stored as crm.lead.inquiry_data, description rendered from
+        it), the LEAD_PASSTHROUGH_FIELDS, state and country (names or codes)
+        and extra_vals (source specific lead fields).'''
+        vals = {
+            'type': 'lead',
+            'name': record['name'],
+            self._ingestion_unique_field: record['unique_id'],
+            'contact_name': record['contact_name'],
+            'probability': record.get('probability', 10),
+            'user_id': False,
+            'team_id': False,
+            'source_id': source_id,
+            'description': record.get('description'),
+        }
+        if record.get('inquiry'):
+            inquiry = dict(record['inquiry'], source=self._ingestion_source_name)
+            vals['inquiry_data'] = inquiry
+            vals['description'] = vals['description'] or self._ingestion_render_description(inquiry)
+        for field in LEAD_PASSTHROUGH_FIELDS:
+            if record.get(field):
+                vals[field] = record[field]
+        with metrics.timed('geo') if metrics else nullcontext():
+            self._ingestion_enrich_location(vals, record)
+        vals.update(record.get('extra_vals') or {})
+        return vals
+
+    def _ingestion_render_description(self, inquiry):
+        '''Human-readable lead description of a normalized inquiry'''
+        lines = [f"{self._ingestion_source_name} Lead", '=' * 50]
+        for line in self._ingestion_description_fields:
+            if line is None:
+                lines.append('')
+            else:
+                key, label = line
+                lines.append(f"{label}: {inquiry.get(key) or 'N/A'}")
+        return "\n".join(lines) + "\n"
+
+    def _ingestion_enrich_location(self, vals, record):
+        '''Resolve country and state from the in-memory geo index and fill the
+        gaps from the PIN code table. No query once the index is warm.'''
+        Country = self.env['res.country']
+        State = self.env['res.country.state']
+        if record.get('country'):
+            country_id = Country._geo_resolve_country_id(record['country'])
+            if country_id:
+                vals['country_id'] = country_id
+
+        if record.get('state'):
+            state_id = State._geo_resolve_state_id(record['state'], vals.get('country_id'))
+            if state_id:
+                vals['state_id'] = state_id
+
+        if vals.get('zip') and not (vals.get('state_id') and vals.get('city')):
+            state_id, district = State._geo_resolve_pincode(vals['zip'], vals.get('country_id'))
+            if state_id and not vals.get('state_id'):
+                vals['state_id'] = state_id
+            if district and not vals.get('city'):
+                vals['city'] = district
+
+        # Some sources send only a city
+        if not vals.get('state_id') and vals.get('city'):
+            state_id = State._geo_resolve_city_state_id(vals['city'], vals.get('country_id'))
+            if state_id:
+                vals['state_id'] = state_id
+
+    # ------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------
+
+    def _ingestion_get_utm_source(self):
+        UtmSource = self.env['utm.source']
+        source = UtmSource.search([('name', '=', self._ingestion_source_name)], limit=1)
+        if not source:
+            source = UtmSource.create({'name': self._ingestion_source_name})
+        return source
+
+    def _existing_unique_ids(self, unique_ids):
+        '''Return {unique_id: lead_id} for the inquiries of a payload that are
+        already in the CRM, using one IN query instead of a search per inquiry.'''
+        if not unique_ids:
+            return {}
+        field = self._ingestion_unique_field
+        leads = self.env['crm.lead'].with_context(active_test=False).search_read(
+            [(field, 'in', list(set(unique_ids)))], [field]
+        )
+        return {lead[field]: lead['id'] for lead in leads}
+
+    def _ingestion_drop_contact_duplicates(self, vals_list, source_id, stats, outcomes):
+        '''Leave out the lead values of buyers who already have a lead from
+        this source created within contact_dedup_hours, or an earlier record
+        in the same page. Buyers are matched on the normalized, indexed
+        contact keys (E.164 phone, normalized email) with one query.
+
+        Returns (kept values, repeats): repeats are (values, target) pairs,
+        target ('lead', lead id) or ('page', unique ID of the earlier record),
+        for _ingestion_log_repeat_inquiries.'''
+        if not self.contact_dedup_hours or not vals_list:
+            return vals_list, []
+        Lead = self.env['crm.lead']
+        Country = self.env['res.country']
+        keys = [
+            Lead._contact_keys(vals.get('email_from'), vals.get('phone'), Country.browse(vals.get('country_id')))
+            for vals in vals_list
+        ]
+        emails = list({email for email, _phone in keys if email})
+        phones = list({phone for _email, phone in keys if phone})
+        known = {}
+        if emails or phones:
+            key_domains = []
+            if emails:
+                key_domains.append([('email_normalized', 'in', emails)])
+            if phones:
+                key_domains.append([('phone_sanitized', 'in', phones)])
+            key_domain = key_domains[0] if len(key_domains) == 1 else ['|'] + key_domains[0] + key_domains[1]
+            since = fields.Datetime.now() - timedelta(hours=self.contact_dedup_hours)
+            for lead in Lead.search_read(
+                [('source_id', '=', source_id), ('create_date', '>=', since)] + key_domain,
+                ['email_normalized', 'phone_sanitized'], order='id',
+            ):
+                for key in (lead['email_normalized'], lead['phone_sanitized']):
+                    if key:
+                        known.setdefault(key, ('lead', lead['id']))
+
+        field = self._ingestion_unique_field
+        kept = []
+        repeats = []
+        for vals, contact_keys in zip(vals_list, keys):
+            target = next((known[key] for key in contact_keys if key and key in known), None)
+            if target is not None:
+                stats['duplicates'] += 1
+                repeats.append((vals, target))
+                _logger.info(f"» Repeat inquiry: {vals.get('contact_name')} (ID: {vals[field]}) - Same buyer as {target[0]} {target[1]}")
+                continue
+            # Later records of the same buyer in this page
+            for key in contact_keys:
+                if key:
+                    known[key] = ('page', vals[field])
+            kept.append(vals)
+        return kept, repeats
+
+    def _ingestion_log_repeat_inquiries(self, repeats, outcomes):
+        '''Post the inquiries left out by _ingestion_drop_contact_duplicates
+        on the lead of their buyer, so sales sees every request. One batched
+        log for the whole page.'''
+        field = self._ingestion_unique_field
+        bodies = defaultdict(list)
+        for vals, (kind, target) in repeats:
+            lead_id = target if kind == 'lead' else outcomes.get(target, (None, False))[1]
+            outcomes[vals[field]] = ('duplicate', lead_id or False, False)
+            if lead_id:
+                bodies[lead_id].append(
+                    Markup("<p>Repeat inquiry from %s (ID: %s)</p>") % (self._ingestion_source_name, vals[field])
+                    + plaintext2html(vals.get('description') or vals.get('name') or '')
+                )
+        if bodies:
+            self.env['crm.lead'].browse(list(bodies))._message_log_batch(
+                bodies={lead_id: Markup().join(parts) for lead_id, parts in bodies.items()},
+            )
+
+    def _ingestion_match_partners(self, vals_list):
+        '''Set partner_id on the lead values whose buyer is an existing
+        contact, matched on the normalized email and E.164 phone of the whole
+        batch with one query. A buyer is linked only to an unambiguous
+        contact whose email and phone do not contradict the inquiry (a
+        missing one is filled in from the lead, as when linking by hand).
+        Returns the number of linked leads.'''
+        vals_list = [vals for vals in vals_list if not vals.get('partner_id')]
+        if not vals_list:
+            return 0
+        Lead = self.env['crm.lead']
+        Country = self.env['res.country']
+        keys = [
+            Lead._contact_keys(vals.get('email_from'), vals.get('phone'), Country.browse(vals.get('country_id')))
+            for vals in vals_list
+        ]
+        emails = list({email for email, _phone in keys if email})
+        phones = list({phone for _email, phone in keys if phone})
+        if not emails and not phones:
+            return 0
+        if emails and phones:
+            domain = ['|', ('email_normalized', 'in', emails), ('phone_sanitized', 'in', phones)]
+        else:
+            domain = [('email_normalized', 'in', emails)] if emails else [('phone_sanitized', 'in', phones)]
+        by_email, by_phone = {}, {}
+        # Oldest contact first when several share a key
+        for partner in self.env['res.partner'].search_read(domain, ['email_normalized', 'phone_sanitized'], order='id'):
+            if partner['email_normalized']:
+                by_email.setdefault(partner['email_normalized'], partner)
+            if partner['phone_sanitized']:
+                by_phone.setdefault(partner['phone_sanitized'], partner)
+
+        linked = 0
+        for vals, (email, phone) in zip(vals_list, keys):
+            candidates = {partner['id']: partner for partner in (by_email.get(email), by_phone.get(phone)) if partner}
+            if len(candidates) != 1:
+                continue
+            partner = next(iter(candidates.values()))
+            if email and partner['email_normalized'] not in (False, email):
+                continue
+            if phone and partner['phone_sanitized'] not in (False, phone):
+                continue
+            vals['partner_id'] = partner['id']
+            linked += 1
+        return linked
+
+    def _create_leads_batched(self, vals_list, fast=False):
+        '''Create leads through crm.lead.create(vals_list) in chunks of batch_size.
+
+        Every chunk runs in a savepoint. A chunk that fails is split in halves
+        and retried (bisection), so a bad inquiry costs about log2(batch)
+        extra creates instead of a row-by-row replay of its chunk. Rows
+        rejected by the unique index on the source's ID field (e.g. inserted
+        meanwhile by an overlapping worker) are skipped as duplicates
+        instead of failures. With fast, leads are
+        created under FAST_INGEST_CONTEXT and post-processed once at the end.
+        The created leads are added to the lead analysis in the same
+        transaction.
+        Returns (created leads, [duplicate vals], [(vals, error), ...]).
+        '''
+        Lead = self.env['crm.lead'].with_context(
+            default_user_id=False,
+            default_team_id=False,
+            mail_create_nosubscribe=True,
+            **(FAST_INGEST_CONTEXT if fast else {}),
+        )
+        batch_size = max(self.batch_size or 100, 1)
+        created_ids = []
+        duplicates = []
+        failures = []
+
+        def create_chunk(chunk):
+            try:
+                with self.env.cr.savepoint():
+                    created_ids.extend(Lead.create(chunk).ids)
+            except UniqueViolation:
+                if len(chunk) == 1:
+                    duplicates.append(chunk[0])
+                    return
+                split(chunk)
+            except Exception as e:
+                if len(chunk) == 1:
+                    failures.append((chunk[0], e))
+                    return
+                _logger.warning(f"Batch of {len(chunk)} leads failed ({e}), bisecting")
+                split(chunk)
+
+        def split(chunk):
+            middle = len(chunk) // 2
+            create_chunk(chunk[:middle])
+            create_chunk(chunk[middle:])
+
+        for start in range(0, len(vals_list), batch_size):
+            create_chunk(vals_list[start:start + batch_size])
+        if fast and created_ids:
+            self._ingestion_post_process(self.env['crm.lead'].browse(created_ids))
+        self.env['lead.ingestion.report']._add_leads(created_ids)
+        return Lead.browse(created_ids), duplicates, failures
+
+    def _ingestion_post_process(self, leads):
+        '''Chatter work skipped by fast ingest, done once for a whole batch:
+        the creation messages in one insert, then followers and assignment
+        notifications per salesperson (leads assigned through extra_vals or
+        an override). Sources needing activities extend this.'''
+        body = Markup("<p>Lead created from %s</p>") % self._ingestion_source_name
+        leads._message_log_batch(bodies=dict.fromkeys(leads.ids, body))
+        for user, user_leads in leads.filtered('user_id').grouped('user_id').items():
+            user_leads.message_subscribe(partner_ids=user.partner_id.ids)
+            user_leads._message_auto_subscribe_notify(user.partner_id.ids, 'mail.message_user_assigned')
+
+    @api.model
+    def _ingestion_new_stats(self):
+        return {
+            'fetched': 0,
+            'created': 0,
+            'duplicates': 0,
+            'no_id': 0,
+            'failed': 0,
+            'queued': 0,
+            'partners': 0,
+            'errors': [],
+            'error': False,
+            'skipped': False,
+            'metrics': IngestionMetrics(),
+        }
+
+    @api.model
+    def _ingestion_summary(self, stats):
+        if stats['skipped']:
+            return "Another fetch of this account is still running, nothing was fetched. Try again once it is done."
+        summary = (
+            f"API returned {stats['fetched']} leads\n"
+            f"✓ Created: {stats['created']}\n"
+            f"» Skipped (Duplicate): {stats['duplicates']}\n"
+            f"» Skipped (No ID): {stats['no_id']}\n"
+            f"✗ Failed: {stats['failed']}"
+        )
+        if stats['partners']:
+            summary += f"\n» Linked to existing contacts: {stats['partners']}"
+        if stats['queued']:
+            summary += f"\n» Queued for processing: {stats['queued']}"
+        if stats['errors']:
+            summary += "\n\nErrors:\n" + "\n".join(stats['errors'][:5])
+        return summary
+
+    @api.model
+    def _ingestion_notification(self, stats):
+        '''Client action reporting a manual run to the user'''
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': 'Fetch Skipped' if stats['skipped'] else 'Fetch Complete',
+                'message': self._ingestion_summary(stats),
+                'type': 'success' if stats['created'] > 0 else 'warning',
+                'sticky': True
+            }
+        }
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+# FILE: lead_ingestion_core/models/res_country.py
+
+import re
+from odoo import api, models, tools
+from odoo.addons.lead_ingestion_core.tools import lookup_city_state, lookup_pincode
+
+# Spellings used by the marketplaces that differ from the names in base data.
+# Keys and values are normalized (see _normalize_geo_name); an alias is only
+# indexed when its target exists.
+INDIAN_STATE_ALIASES = {
+    'nct of delhi': 'delhi',
+    'national capital territory of delhi': 'delhi',
+    'delhi nct': 'delhi',
+    'new delhi': 'delhi',
+    'orissa': 'odisha',
+    'pondicherry': 'puducherry',
+    'pondichery': 'puducherry',
+    'uttaranchal': 'uttarakhand',
+    'chattisgarh': 'chhattisgarh',
+    'chhatisgarh': 'chhattisgarh',
+    'telengana': 'telangana',
+    'tamilnadu': 'tamil nadu',
+    'andaman and nicobar islands': 'andaman and nicobar',
+    'andaman and nicobar': 'andaman and nicobar islands',
+    'dadra and nagar haveli': 'dadra and nagar haveli and daman and diu',
+    'daman and diu': 'dadra and nagar haveli and daman and diu',
+}
+
+COUNTRY_ALIASES = {
+    'bharat': 'in',
+    'usa': 'us',
+    'united states of america': 'us',
+    'uk': 'gb',
+    'uae': 'ae',
+}
+
+
+def _normalize_geo_name(value):
+    '''Lower-case, '&' -> 'and', punctuation and repeated spaces collapsed.'''
+    value = str(value or '').lower().replace('&', ' and ')
+    return re.sub(r'[^a-z0-9]+', ' ', value).strip()
+
+
+def _translated_values(name):
+    '''Every translation of a translatable column read through SQL.'''
+    if isinstance(name, dict):
+        return [value for value in name.values() if value]
+    return [name] if name else []
+
+
+class ResCountry(models.Model):
+    _inherit = 'res.country'
+
+    @api.model
+    @tools.ormcache()
+    def _get_geo_index(self):
+        '''{normalized code, name or alias: country_id}, built with one query
+        and kept per process until countries change.'''
+        self.env.cr.execute("SELECT id, code, name FROM res_country")
+        index = {}
+        for country_id, code, name in self.env.cr.fetchall():
+            for value in _translated_values(name):
+                index.setdefault(_normalize_geo_name(value), country_id)
+            if code:
+                index[_normalize_geo_name(code)] = country_id
+        for alias, code in COUNTRY_ALIASES.items():
+            if code in index:
+                index.setdefault(alias, index[code])
+        return index
+
+    @api.model
+    def _geo_resolve_country_id(self, value):
+        '''Country id for an ISO code or a name in any language, or False.'''
+        return self._get_geo_index().get(_normalize_geo_name(value), False)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        countries = super().create(vals_list)
+        self.env.registry.clear_cache()
+        return countries
+
+    def write(self, vals):
+        res = super().write(vals)
+        if {'name', 'code'} & vals.keys():
+            self.env.registry.clear_cache()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.env.registry.clear_cache()
+        return res
+
+
+class ResCountryState(models.Model):
+    _inherit = 'res.country.state'
+
+    @api.model
+    @tools.ormcache()
+    def _get_geo_index(self):
+        '''{normalized name, code or alias: {country_id: state_id}}, built with
+        one query and kept per process until states change.'''
+        self.env.cr.execute("SELECT id, country_id, code, name FROM res_country_state")
+        index = {}
+        for state_id, country_id, code, name in self.env.cr.fetchall():
+            for value in _translated_values(name):
+                index.setdefault(_normalize_geo_name(value), {}).setdefault(country_id, state_id)
+            if code:
+                index.setdefault(_normalize_geo_name(code), {}).setdefault(country_id, state_id)
+        india_id = self.env['res.country']._geo_resolve_country_id('IN')
+        for alias, target in INDIAN_STATE_ALIASES.items():
+            state_id = index.get(target, {}).get(india_id)
+            if state_id:
+                index.setdefault(alias, {}).setdefault(india_id, state_id)
+        return index
+
+    @api.model
+    def _geo_resolve_state_id(self, value, country_id=False):
+        '''State id for a name, code or known alias, or False.
+
+        Without a country, an unambiguous match wins, then the Indian state of
+        that name, since both marketplaces are Indian.
+        '''
+        candidates = self._get_geo_index().get(_normalize_geo_name(value))
+        if not candidates:
+            return False
+        if country_id:
+            return candidates.get(country_id, False)
+        if len(candidates) == 1:
+            return next(iter(candidates.values()))
+        india_id = self.env['res.country']._geo_resolve_country_id('IN')
+        return candidates.get(india_id, False)
+
+    @api.model
+    def _geo_resolve_pincode(self, pincode, country_id=False):
+        '''(state_id, district) of an Indian PIN code from the bundled table,
+        (False, '') when unknown or when the lead is not in India.'''
+        india_id = self.env['res.country']._geo_resolve_country_id('IN')
+        found = lookup_pincode(pincode)
+        if not found or (country_id and country_id != india_id):
+            return False, ''
+        state_name, district = found
+        return self._geo_resolve_state_id(state_name, india_id), district
+
+    @api.model
+    def _geo_resolve_city_state_id(self, city, country_id=False):
+        '''State id of an Indian city known to the city table (see tools.pincode), or False.'''
+        india_id = self.env['res.country']._geo_resolve_country_id('IN')
+        state_name = lookup_city_state(city)
+        if not state_name or (country_id and country_id != india_id):
+            return False
+        return self._geo_resolve_state_id(state_name, india_id)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        states = super().create(vals_list)
+        self.env.registry.clear_cache()
+        return states
+
+    def write(self, vals):
+        res = super().write(vals)
+        if {'name', 'code', 'country_id'} & vals.keys():
+            self.env.registry.clear_cache()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.env.registry.clear_cache()
+        return res
@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+# FILE: lead_ingestion_core/models/res_partner.py
+
+from odoo import models
+
+
+class ResPartner(models.Model):
+    '''Contact keys of the ingestion partner matching, looked up by equality'''
+    _inherit = 'res.partner'
+
+    # email_normalized only has a trigram index, no use for = and IN lookups
+    # (phone_sanitized already has a b-tree index)
+    _email_normalized_lookup_idx = models.Index('(email_normalized) WHERE email_normalized IS NOT NULL')
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+# FILE: lead_ingestion_core/tests/common.py
+
+import logging
+import os
+import time
+import tracemalloc
+
+from odoo.tests import TransactionCase
+
+from .mock_marketplace import MockMarketplace
+
+_logger = logging.getLogger(__name__)
+
+# Inquiry counts of the benchmarks, e.g. LEAD_INGESTION_BENCHMARK_SIZES=100,10000
+DEFAULT_BENCHMARK_SIZES = (100, 10000, 100000)
+
+
+class IngestionCase(TransactionCase):
+    '''Runs a marketplace integration against the local mock server.
+
+    Subclasses set _api_url_param (the system parameter holding the API URL)
+    and _mock_url (the MockMarketplace property with the matching endpoint).
+    '''
+    _api_url_param = None
+    _mock_url = None
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.mock = MockMarketplace().start()
+        cls.addClassCleanup(cls.mock.stop)
+        cls.env['ir.config_parameter'].set_param(cls._api_url_param, getattr(cls.mock, cls._mock_url))
+        # Accounts fetched serially on the test cursor; threads cannot see
+        # the uncommitted test data on cursors of their own
+        cls.env['ir.config_parameter'].set_param('lead_ingestion_core.fetch_workers', 1)
+
+    def setUp(self):
+        super().setUp()
+        # Scheduled runs and the processing job commit between batches
+        self.patch(self.env.cr, 'commit', lambda: None)
+
+    def count_leads(self, unique_field):
+        '''Leads of the current mock batch'''
+        return self.env['crm.lead'].with_context(active_test=False).search_count(
+            [(unique_field, '=like', f"{self.mock.batch_prefix}%")]
+        )
+
+
+class IngestionBenchmarkCase(IngestionCase):
+    '''Measures leads/sec, SQL queries and peak Python memory of a run.
+
+    Peak memory comes from tracemalloc, which slows the run down; compare
+    leads/sec between runs made the same way only.
+    '''
+
+    @classmethod
+    def benchmark_sizes(cls):
+        sizes = os.environ.get('LEAD_INGESTION_BENCHMARK_SIZES')
+        if not sizes:
+            return DEFAULT_BENCHMARK_SIZES
+        return tuple(int(size) for size in sizes.split(',') if size.strip())
+
+    def run_benchmark(self, label, size, run, unique_field):
+        '''Call run() and report its throughput. Returns the report dict.'''
+        self.env.flush_all()
+        self.env.invalidate_all()
+        queries_before = self.env.cr.sql_log_count
+        tracemalloc.start()
+        started = time.perf_counter()
+        try:
+            run()
+            self.env.flush_all()
+            elapsed = time.perf_counter() - started
+            _current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        report = {
+            'label': label,
+            'inquiries': size,
+            'created': self.count_leads(unique_field),
+            'seconds': elapsed,
+            'queries': self.env.cr.sql_log_count - queries_before,
+            'peak_mib': peak / 1024 / 1024,
+        }
+        report['leads_per_second'] = report['created'] / elapsed if elapsed else 0.0
+        _logger.info(
+            f"BENCHMARK {label} [{size} inquiries]: {report['created']} leads in {elapsed:.2f}s "
+            f"({report['leads_per_second']:.0f} leads/s), {report['queries']} SQL queries "
+            f"({report['queries'] / max(size, 1):.1f}/inquiry), peak memory {report['peak_mib']:.1f} MiB"
+        )
+        return report
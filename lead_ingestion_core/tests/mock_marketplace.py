@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+# FILE: lead_ingestion_core/tests/mock_marketplace.py
+'''Local stand-in for the IndiaMART and TradeIndia pull APIs.
+
+Serves synthetic, deterministic inquiries on
+
+* ``/wservce/crm/crmListing/v2/`` (IndiaMART, every record in one answer)
+* ``/utils/my_inquiry.html`` (TradeIndia, ``limit`` / ``page_no`` paging,
+  newest inquiry first)
+
+and can answer slowly or fail, to exercise the fetch paths without the
+real endpoints. Plain Python, so it also runs standalone:
+
+    python3 lead_ingestion_core/tests/mock_marketplace.py --total 10000 --port 8900
+
+then point the ``indiamart_integration.api_url`` / ``tradeindia_integration.api_url``
+system parameters at ``http://127.0.0.1:8900/...``.
+'''
+
+import argparse
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+INDIAMART_PATH = '/wservce/crm/crmListing/v2/'
+TRADEINDIA_PATH = '/utils/my_inquiry.html'
+
+INDIAMART_FAILURE = {
+    'CODE': 429,
+    'STATUS': 'FAILURE',
+    'MESSAGE': 'It is advised to hit this API once in every 5 minutes,but it seems that you have crossed this limit. please try again after 5 minutes.',
+}
+
+# (city, state, pincode) rotated over the synthetic inquiries
+LOCATIONS = [
+    ('Mumbai', 'Maharashtra', '400001'),
+    ('New Delhi', 'Delhi', '110001'),
+    ('Bengaluru', 'Karnataka', '560001'),
+    ('Chennai', 'Tamil Nadu', '600001'),
+    ('Ahmedabad', 'Gujarat', '380001'),
+    ('Kolkata', 'West Bengal', '700001'),
+    ('Hyderabad', 'Telangana', '500001'),
+    ('Jaipur', 'Rajasthan', '302001'),
+    ('Ludhiana', 'Punjab', '141001'),
+    ('Bhubaneswar', 'Orissa', '751001'),
+]
+PRODUCTS = ['Industrial Valve', 'Solar Panel', 'PVC Pipe', 'Steel Sheet', 'LED Driver', 'Packaging Machine']
+QUERY_TYPES = ['W', 'B', 'P', 'BIZ', 'WA']
+
+
+def indiamart_record(batch, index, when):
+    city, state, pincode = LOCATIONS[index % len(LOCATIONS)]
+    product = PRODUCTS[index % len(PRODUCTS)]
+    return {
+        'UNIQUE_QUERY_ID': f"{batch}{index:08d}",
+        'QUERY_TYPE': QUERY_TYPES[index % len(QUERY_TYPES)],
+        'QUERY_TIME': when.strftime('%Y-%m-%d %H:%M:%S'),
+        'SENDER_NAME': f"Buyer {index}",
+        'SENDER_MOBILE': f"+91-98{batch[-2:]}{index % 1000000:06d}",
+        'SENDER_EMAIL': f"buyer{index}.{batch}@example.com",
+        'SUBJECT': f"Requirement for {product}",
+        'SENDER_COMPANY': f"Company {index % 997}",
+        'SENDER_ADDRESS': f"{index % 300} Market Road, {city}",
+        'SENDER_CITY': city,
+        'SENDER_STATE': state,
+        'SENDER_PINCODE': pincode,
+        'SENDER_COUNTRY_ISO': 'IN',
+        'QUERY_PRODUCT_NAME': product,
+        'QUERY_MESSAGE': f"I want to buy {index % 50 + 1} units of {product}. Please send the best price.",
+        'QUERY_MCAT_NAME': product,
+    }
+
+
+def tradeindia_record(batch, index, when):
+    city, state, _pincode = LOCATIONS[index % len(LOCATIONS)]
+    product = PRODUCTS[index % len(PRODUCTS)]
+    mobile = f"+91-97{batch[-2:]}{index % 1000000:06d}"
+    return {
+        'rfi_id': f"{batch}{index:08d}",
+        'sender_name': f"Buyer {index}",
+        'sender_co': f"Company {index % 997}",
+        'sender_email': f"buyer{index}.{batch}@example.net",
+        'sender_mobile': f'<a href="tel:{mobile}">{mobile}</a>',
+        'sender_city': city,
+        'sender_state': state,
+        'sender_country': 'India',
+        'address': f"{index % 300} Industrial Area, {city}",
+        'product_name': product,
+        'subject': f"Inquiry for {product}",
+        'message': f"Please quote for {index % 50 + 1} units of {product}.",
+        'generated_date': when.strftime('%Y-%m-%d'),
+        'generated_time': when.strftime('%H:%M:%S'),
+        'source': 'Direct',
+        'inquiry_type': 'Buy Lead',
+    }
+
+
+class MockMarketplace:
+    '''Threaded HTTP server serving `total` synthetic inquiries per marketplace.
+
+    * delay: seconds to wait before every answer (slow API)
+    * fail_pages: TradeIndia page numbers answered with `failure`
+    * failure: 'http' (HTTP 503), 'payload' (an error document) or
+      'indiamart' (every IndiaMART call gets the throttling FAILURE payload)
+
+    reset() starts a new batch: the IDs, phones and emails change, so a second
+    run against the same database creates new leads instead of duplicates.
+    '''
+
+    def __init__(self, total=100, delay=0.0, fail_pages=(), failure=None, host='127.0.0.1', port=0):
+        self.requests = []
+        self._batch = 0
+        self.reset(total, delay, fail_pages, failure)
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    def reset(self, total=100, delay=0.0, fail_pages=(), failure=None):
+        self.total = total
+        self.delay = delay
+        self.fail_pages = set(fail_pages)
+        self.failure = failure
+        self.requests.clear()
+        self._batch += 1
+        # Newest first, one inquiry per second going back in time
+        self._now = datetime.now().replace(microsecond=0)
+
+    @property
+    def batch_prefix(self):
+        return f"{self._batch:02d}"
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def indiamart_url(self):
+        return self.base_url + INDIAMART_PATH
+
+    @property
+    def tradeindia_url(self):
+        return self.base_url + TRADEINDIA_PATH
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name='mock_marketplace', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _records(self, make_record, start, stop):
+        stop = min(stop, self.total)
+        return [
+            make_record(self.batch_prefix, index, self._now - timedelta(seconds=index))
+            for index in range(start, stop)
+        ]
+
+    def _handler_class(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, payload):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+                mock.requests.append((url.path, params))
+                if mock.delay:
+                    time.sleep(mock.delay)
+                if url.path == INDIAMART_PATH:
+                    self._indiamart(params)
+                elif url.path == TRADEINDIA_PATH:
+                    self._tradeindia(params)
+                else:
+                    self._send(404, {'error': 'Not found'})
+
+            def _indiamart(self, params):
+                if not params.get('glusr_crm_key'):
+                    return self._send(200, {'CODE': 401, 'STATUS': 'FAILURE', 'MESSAGE': 'Invalid Key'})
+                if mock.failure == 'indiamart':
+                    return self._send(200, INDIAMART_FAILURE)
+                records = mock._records(indiamart_record, 0, mock.total)
+                self._send(200, {
+                    'CODE': 200,
+                    'STATUS': 'SUCCESS',
+                    'MESSAGE': '',
+                    'TOTAL_RECORDS': len(records),
+                    'RESPONSE': records,
+                })
+
+            def _tradeindia(self, params):
+                if not (params.get('userid') and params.get('profile_id') and params.get('key')):
+                    return self._send(200, {'error': 'Invalid credentials'})
+                limit = int(params.get('limit') or 10)
+                page_no = int(params.get('page_no') or 1)
+                if page_no in mock.fail_pages:
+                    if mock.failure == 'payload':
+                        return self._send(200, {'error': 'Temporary failure, please retry'})
+                    return self._send(503, {'error': 'Service Unavailable'})
+                start = (page_no - 1) * limit
+                self._send(200, mock._records(tradeindia_record, start, start + limit))
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--total', type=int, default=100, help="Inquiries served per marketplace")
+    parser.add_argument('--delay', type=float, default=0.0, help="Seconds to wait before every answer")
+    parser.add_argument('--fail-pages', default='', help="Comma separated TradeIndia pages that fail")
+    parser.add_argument('--failure', choices=['http', 'payload', 'indiamart'])
+    args = parser.parse_args()
+    fail_pages = [int(page) for page in args.fail_pages.split(',') if page.strip()]
+    mock = MockMarketplace(args.total, args.delay, fail_pages, args.failure, args.host, args.port)
+    print(f"IndiaMART:  {mock.indiamart_url}\nTradeIndia: {mock.tradeindia_url}")
+    try:
+        mock._server.serve_forever()
+    except KeyboardInterrupt:
+        mock.stop()
+
+
+if __name__ == '__main__':
+    main()
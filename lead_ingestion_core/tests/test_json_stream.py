@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+# FILE: lead_ingestion_core/tests/test_json_stream.py
+
+import json
+from odoo.tests import BaseCase, tagged
+from odoo.addons.lead_ingestion_core.tools.json_stream import JsonArrayStream
+
+# (document, key): every document is parsed split in two at each offset
+DOCUMENTS = [
+    ('[]', None),
+    ('[1.5, 10e3, -2, 0.25E-2, 7]', None),
+    ('[true, false, null, "a,b]", {"x": [1, {"y": 2.5}]}]', None),
+    ('{"CODE": 200, "STATUS": "SUCCESS", "RESPONSE": [{"ID": 1, "Q": 12.75}, {"ID": 22, "Q": 1e2}], "TOTAL": 3.5}', 'RESPONSE'),
+    ('{"CODE": 429, "MESSAGE": "It is advised to hit this API once in every 5 minutes"}', 'RESPONSE'),
+    ('{"RESPONSE": [], "TOTAL_RECORDS": 10}', 'RESPONSE'),
+    ('  [ "Pune", "Navi Mumbai",\n "मुंबई" ]  ', None),
+    ('{"error": "Invalid key"}', None),
+]
+
+
+@tagged('post_install', '-at_install')
+class TestJsonArrayStream(BaseCase):
+
+    def expected(self, document, key):
+        data = json.loads(document)
+        if key is None:
+            return (data, {}) if isinstance(data, list) else ([], data)
+        items = data.pop(key, [])
+        return items, data
+
+    def test_split_at_every_offset(self):
+        for document, key in DOCUMENTS:
+            raw = document.encode()
+            items, meta = self.expected(document, key)
+            for offset in range(len(raw) + 1):
+                with self.subTest(document=document, offset=offset):
+                    stream = JsonArrayStream([raw[:offset], raw[offset:]], key=key)
+                    self.assertEqual(list(stream), items)
+                    self.assertEqual(stream.meta, meta)
+                    self.assertEqual(stream.bytes_read, len(raw))
+
+    def test_one_byte_chunks(self):
+        for document, key in DOCUMENTS:
+            raw = document.encode()
+            with self.subTest(document=document):
+                stream = JsonArrayStream([raw[i:i + 1] for i in range(len(raw))], key=key)
+                self.assertEqual(list(stream), self.expected(document, key)[0])
+
+    def test_invalid_document(self):
+        for document in ('[1, 2', '[1 2]', '{"RESPONSE": [1,, 2]}'):
+            with self.subTest(document=document), self.assertRaises(ValueError):
+                list(JsonArrayStream([document.encode()], key='RESPONSE' if document.startswith('{') else None))
@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+from .http_client import http_get, reserve_connections
+from .pincode import lookup_pincode, lookup_city_state
+from .payload_archive import ARCHIVE_MIMETYPE, PayloadArchiveWriter, iter_payload_archive
+from .metrics import STAGES, IngestionMetrics
+from .json_stream import CHUNK_SIZE, JsonArrayStream
+from .polling import in_business_hours, minutes_until_open, poll_interval, throttle_backoff
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+# FILE: lead_ingestion_core/tools/http_client.py
+'''Pooled, retrying HTTP client for the marketplace APIs.
+
+One requests.Session per worker process keeps TCP+TLS connections alive
+between calls (and between cron runs). Connection errors and 5xx answers
+are retried with bounded exponential backoff; read timeouts and 5xx
+answers only for calls that are safe to repeat (retry_reads). Connect and read timeouts
+are separate so an unreachable host fails fast while a slow but working
+API still gets time to answer.
+'''
+
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 30
+# Retries after the first attempt; waits 0.5s, 1s, 2s between them
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.5
+RETRY_STATUSES = (500, 502, 503, 504)
+# Connections kept per host at least; reserve_connections() grows it to the
+# parallel requests of a scheduled fetch (accounts x pages per account)
+POOL_SIZE = 8
+
+_lock = threading.Lock()
+# retry_reads -> session of the current process
+_sessions = {}
+_sessions_pid = None
+_pool_size = POOL_SIZE
+
+
+def _build_adapter(retry_reads):
+    retry = Retry(
+        total=MAX_RETRIES,
+        connect=MAX_RETRIES,
+        read=MAX_RETRIES if retry_reads else 0,
+        status=MAX_RETRIES if retry_reads else 0,
+        other=0,
+        backoff_factor=BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUSES if retry_reads else (),
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        raise_on_status=False,
+    )
+    return HTTPAdapter(pool_connections=4, pool_maxsize=_pool_size, max_retries=retry)
+
+
+def _mount(session, retry_reads):
+    adapter = _build_adapter(retry_reads)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+
+
+def get_session(retry_reads=True):
+    '''The session of the current worker process for this retry policy.
+    Rebuilt after a fork so prefork workers never share sockets.'''
+    global _sessions, _sessions_pid
+    if _sessions_pid != os.getpid() or retry_reads not in _sessions:
+        with _lock:
+            if _sessions_pid != os.getpid():
+                _sessions = {}
+                _sessions_pid = os.getpid()
+            if retry_reads not in _sessions:
+                session = requests.Session()
+                _mount(session, retry_reads)
+                _sessions[retry_reads] = session
+    return _sessions[retry_reads]
+
+
+def reserve_connections(count):
+    '''Grow the pool to keep `count` connections per host alive, so that
+    many concurrent requests never discard connections. Never shrinks it.'''
+    global _pool_size
+    if count <= _pool_size:
+        return
+    with _lock:
+        if count <= _pool_size:
+            return
+        _pool_size = count
+        if _sessions_pid == os.getpid():
+            # Requests in flight finish on the previous adapter
+            for retry_reads, session in _sessions.items():
+                _mount(session, retry_reads)
+
+
+def http_get(url, params=None, read_timeout=READ_TIMEOUT, compress=True, retry_reads=True, **kwargs):
+    '''GET through the pooled session. compress=False asks for an
+    uncompressed body (e.g. to stream it unchanged).
+
+    retry_reads=False retries connection errors only (the request never
+    reached the API): for calls the API counts or answers only once, e.g.
+    "everything new since the last call" or a strict call rate limit, a
+    read timeout or 5xx after it was served must not send it again.'''
+    headers = dict(kwargs.pop('headers', None) or {})
+    headers.setdefault('Accept-Encoding', 'gzip, deflate' if compress else 'identity')
+    session = get_session(retry_reads)
+    return session.get(url, params=params, timeout=(CONNECT_TIMEOUT, read_timeout), headers=headers, **kwargs)
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+# FILE: lead_ingestion_core/tools/json_stream.py
+'''Incremental parsing of a JSON array inside a streamed HTTP body.
+
+Only the array items are decoded one at a time (json.JSONDecoder.raw_decode
+over a sliding text buffer); the rest of the document is small and kept in
+`meta`. Memory is bounded by the largest single item plus one chunk, not by
+the size of the response.
+'''
+
+import codecs
+import json
+
+CHUNK_SIZE = 64 * 1024
+# Consumed text is dropped from the buffer once it is this long
+COMPACT_THRESHOLD = 256 * 1024
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+_DELIMITERS = _WHITESPACE + ',:]}'
+
+
+class JsonArrayStream:
+    '''Iterate the items of the top-level array (key=None) or of the array
+    under `key` of the top-level object, reading `chunks` (bytes) lazily.
+
+    The other members of the top-level object land in `meta`, fully known
+    once the iteration is over. A document without the array yields nothing.
+
+        stream = JsonArrayStream(response.iter_content(CHUNK_SIZE), key='RESPONSE')
+        for record in stream:
+            ...
+        stream.meta.get('STATUS')
+    '''
+
+    def __init__(self, chunks, key=None):
+        self.key = key
+        self.meta = {}
+        self.bytes_read = 0
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+
+    # ------------------------------------------------------------
+    # Buffer
+    # ------------------------------------------------------------
+
+    def _read(self):
+        '''Append the next chunk to the buffer. False at the end of the body.'''
+        if self._eof:
+            return False
+        if self._pos > COMPACT_THRESHOLD:
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+        for chunk in self._chunks:
+            if chunk:
+                self.bytes_read += len(chunk)
+                self._buffer += self._utf8.decode(chunk)
+                return True
+        self._buffer += self._utf8.decode(b'', final=True)
+        self._eof = True
+        return False
+
+    def _peek(self):
+        '''Next non-whitespace character, '' at the end of the body'''
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._read():
+                return ''
+
+    def _expect(self, *chars):
+        char = self._peek()
+        if char not in chars:
+            raise ValueError(f"Invalid JSON: expected {' or '.join(chars)} at offset {self._pos}, got {char!r}")
+        self._pos += 1
+        return char
+
+    def _value(self):
+        '''Decode the next complete JSON value'''
+        self._peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if self._read():
+                    continue
+                raise
+            # A number or literal ends at a delimiter: cut by the end of the
+            # buffer, it may go on ('1' of '1.5', '10' of '10e3')
+            if not self._eof and not isinstance(value, (dict, list, str)):
+                if end == len(self._buffer) or self._buffer[end] not in _DELIMITERS:
+                    if self._read():
+                        continue
+            self._pos = end
+            return value
+
+    # ------------------------------------------------------------
+    # Document
+    # ------------------------------------------------------------
+
+    def __iter__(self):
+        if self.key is None:
+            if self._peek() != '[':
+                # Not a list (e.g. an error document): keep it as meta
+                value = self._value()
+                self.meta = value if isinstance(value, dict) else {'value': value}
+                return
+            yield from self._items()
+            return
+
+        self._expect('{')
+        if self._peek() == '}':
+            return
+        while True:
+            name = self._value()
+            self._expect(':')
+            if name == self.key and self._peek() == '[':
+                yield from self._items()
+            else:
+                self.meta[name] = self._value()
+            if self._expect(',', '}') == '}':
+                return
+
+    def _items(self):
+        self._expect('[')
+        if self._peek() == ']':
+            self._pos += 1
+            return
+        while True:
+            yield self._value()
+            if self._expect(',', ']') == ']':
+                return
+
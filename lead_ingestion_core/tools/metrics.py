@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+# FILE: lead_ingestion_core/tools/metrics.py
+'''Per-stage timings of one ingestion run, written on its API log record.'''
+
+import time
+from contextlib import contextmanager
+
+# network: waiting for the API, parse: decoding its JSON, staging: inserting
+# the raw inquiries, dedup: looking up existing leads, geo: resolving
+# country/state/city, partner: matching existing contacts, create:
+# crm.lead.create()
+STAGES = ('network', 'parse', 'staging', 'dedup', 'geo', 'partner', 'create')
+
+
+class IngestionMetrics:
+
+    def __init__(self):
+        self.durations = dict.fromkeys(STAGES, 0.0)
+        self.http_calls = 0
+        self.http_status = None
+        self.response_bytes = 0
+
+    @contextmanager
+    def timed(self, stage):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.durations[stage] += time.perf_counter() - started
+
+    def add(self, stage, seconds):
+        self.durations[stage] += seconds
+
+    def record_response(self, status, size):
+        '''One API answer: its HTTP status and body size in bytes'''
+        self.http_calls += 1
+        self.http_status = status
+        self.response_bytes += size or 0
+
+    def log_vals(self):
+        vals = {f'duration_{stage}': seconds for stage, seconds in self.durations.items()}
+        vals.update({
+            'http_calls': self.http_calls,
+            'http_status': self.http_status or 0,
+            'response_bytes': self.response_bytes,
+        })
+        return vals
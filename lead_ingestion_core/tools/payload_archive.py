@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+# FILE: lead_ingestion_core/tools/payload_archive.py
+'''Raw API payload archives: gzip-compressed JSON Lines, one raw record per line.
+
+Plain Python on purpose, so archives can be read outside Odoo as well
+(e.g. to feed the benchmarks or to inspect a bad day with zcat).
+'''
+
+import gzip
+import io
+import json
+
+ARCHIVE_MIMETYPE = 'application/gzip'
+
+
+class PayloadArchiveWriter:
+    '''In-memory archive the pages of a run are appended to'''
+
+    def __init__(self):
+        self._buffer = io.BytesIO()
+        self._gzip = gzip.GzipFile(fileobj=self._buffer, mode='wb')
+        self.count = 0
+
+    def write(self, records):
+        for record in records:
+            self._gzip.write(json.dumps(record, ensure_ascii=False).encode() + b'\n')
+        self.count += len(records)
+
+    def getvalue(self):
+        '''Compressed archive. Closes the writer.'''
+        if not self._gzip.closed:
+            self._gzip.close()
+        return self._buffer.getvalue()
+
+
+def iter_payload_archive(data, page_size=100):
+    '''Yield the records of an archive (bytes or binary file) in pages of page_size'''
+    fileobj = io.BytesIO(data) if isinstance(data, bytes) else data
+    page = []
+    with gzip.GzipFile(fileobj=fileobj, mode='rb') as archive:
+        for line in archive:
+            if not line.strip():
+                continue
+            page.append(json.loads(line))
+            if len(page) >= page_size:
+                yield page
+                page = []
+    if page:
+        yield page
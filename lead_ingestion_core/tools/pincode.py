@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+# FILE: lead_ingestion_core/tools/pincode.py
+'''Indian PIN code -> state lookup, and city -> state.
+
+State-level resolution: the bundled table (data/in_pincode_regions.csv)
+maps postal region and sorting-district prefixes to their state. It names
+a district only for the few prefixes that are a single metro city (Delhi,
+Mumbai, Bengaluru, ...); most PIN codes resolve to their state alone.
+Longer prefixes (up to the full 6-digit PIN code) override shorter ones, so
+the file can be extended with exact rows from the India Post directory
+without changing the lookup.
+
+City names resolve through data/in_cities.csv (major cities, with their
+common spellings: Bangalore, Bombay, Gurgaon, ...) and the metro districts
+of the PIN code table.
+
+3-digit prefixes live in two 1000-slot arrays (a few KB per worker); the
+rare longer prefixes live in a small dict. A lookup is at most four
+constant-time probes.
+'''
+
+import csv
+import os
+import re
+import threading
+from array import array
+
+DATA_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'in_pincode_regions.csv')
+CITY_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'in_cities.csv')
+
+_lock = threading.Lock()
+_table = None
+
+
+def _normalize(value):
+    return re.sub(r'[^a-z0-9]+', ' ', str(value or '').lower()).strip()
+
+
+def _load():
+    names = ['']                    # index 0 means "unknown"
+    name_index = {'': 0}
+    states = array('B', bytes(1000))
+    districts = array('H', bytes(2000))
+    overrides = {}
+
+    def intern(name):
+        if name not in name_index:
+            name_index[name] = len(names)
+            names.append(name)
+        return name_index[name]
+
+    with open(DATA_FILE, newline='', encoding='utf-8') as data_file:
+        # Shorter prefixes first so 3-digit rows overwrite their 2-digit region
+        rows = sorted(csv.DictReader(data_file), key=lambda row: len(row['prefix']))
+    for row in rows:
+        prefix, state, district = row['prefix'].strip(), row['state'].strip(), row['district'].strip()
+        if len(prefix) > 3:
+            overrides[prefix] = (state, district)
+            continue
+        start = int(prefix.ljust(3, '0'))
+        for slot in range(start, start + 10 ** (3 - len(prefix))):
+            states[slot] = intern(state)
+            districts[slot] = intern(district)
+
+    # District name -> state, only for names that belong to a single state
+    city_states = {}
+    for state, district in [(names[s], names[d]) for s, d in zip(states, districts)] + list(overrides.values()):
+        if district:
+            city_states.setdefault(_normalize(district), set()).add(state)
+    city_states = {city: found.pop() for city, found in city_states.items() if len(found) == 1}
+    with open(CITY_FILE, newline='', encoding='utf-8') as city_file:
+        for row in csv.DictReader(city_file):
+            city_states[_normalize(row['city'])] = row['state'].strip()
+    return names, states, districts, overrides, city_states
+
+
+def _get_table():
+    global _table
+    if _table is None:
+        with _lock:
+            if _table is None:
+                _table = _load()
+    return _table
+
+
+def lookup_pincode(pincode):
+    '''Return (state name, district name or '') for a PIN code, or None.'''
+    digits = re.sub(r'\D', '', str(pincode or ''))
+    if len(digits) != 6 or digits[0] == '0':
+        return None
+    names, states, districts, overrides, _city_states = _get_table()
+    for length in (6, 5, 4):
+        if digits[:length] in overrides:
+            return overrides[digits[:length]]
+    slot = int(digits[:3])
+    if not states[slot]:
+        return None
+    return names[states[slot]], names[districts[slot]]
+
+
+def lookup_city_state(city):
+    '''Return the state name of a known city (or alternate spelling), or None.'''
+    return _get_table()[4].get(_normalize(city))
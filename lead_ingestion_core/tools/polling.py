@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+# FILE: lead_ingestion_core/tools/polling.py
+'''Delay until the next scheduled poll of a marketplace account.
+
+All delays are in minutes, all times are naive local (business timezone)
+datetimes; business hours are float hours as in a float_time field, e.g.
+9.5 for 09:30. A window ending before it starts spans midnight.
+'''
+
+from datetime import timedelta
+
+
+def in_business_hours(local_now, start, end):
+    hour = local_now.hour + local_now.minute / 60.0
+    if start == end:
+        return True
+    if start < end:
+        return start <= hour < end
+    return hour >= start or hour < end
+
+
+def minutes_until_open(local_now, start, end):
+    '''0 during business hours, else the minutes until they start'''
+    if in_business_hours(local_now, start, end):
+        return 0.0
+    opening = local_now.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(hours=start)
+    if opening <= local_now:
+        opening += timedelta(days=1)
+    return (opening - local_now).total_seconds() / 60.0
+
+
+def poll_interval(arrivals_per_hour, min_minutes, max_minutes):
+    '''Poll about once per expected inquiry: every 60 / rate minutes,
+    within [min_minutes, max_minutes]'''
+    if arrivals_per_hour <= 0:
+        return float(max_minutes)
+    return float(min(max(60.0 / arrivals_per_hour, min_minutes), max_minutes))
+
+
+def throttle_backoff(throttle_count, min_minutes, max_minutes):
+    '''Exponential backoff after `throttle_count` throttled calls in a row'''
+    return float(min(min_minutes * 2 ** max(throttle_count, 0), max_minutes))
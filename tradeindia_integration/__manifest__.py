@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 {
     'name': 'TradeIndia Integration',
-    'version': '19.0.1.0.0',
+    'version': '19.0.1.2.0',
     'summary': 'Integrate TradeIndia API to fetch leads into Odoo CRM.',
     'author': 'Rohitkumar Singh',
     'website': 'https://www.tradeindia.com',
@@ -9,6 +9,7 @@
     'icon': 'static/description/icon.png',
     'depends': [
         'crm',
+        'lead_ingestion_core',
     ],
     'data': [
         'security/ir.model.access.csv',
@@ -18,6 +19,7 @@
         'views/tradeindia_settings_views.xml',
         'views/tradeindia_fetch_leads_wizard_views.xml',
         'views/tradeindia_api_log_views.xml',
+        'views/tradeindia_inquiry_views.xml',
     ],
     'installable': True,
     'application': True,
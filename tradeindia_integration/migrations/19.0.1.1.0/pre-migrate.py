@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    '''Detach repeated tradeindia_unique_id values so the new partial unique
+    index can be created. The oldest lead of each inquiry keeps its ID.'''
+    cr.execute("""
+        UPDATE crm_lead lead
+           SET tradeindia_unique_id = NULL
+          FROM (
+                SELECT id, row_number() OVER (PARTITION BY tradeindia_unique_id ORDER BY id) AS rank
+                  FROM crm_lead
+                 WHERE tradeindia_unique_id IS NOT NULL
+               ) dup
+         WHERE dup.id = lead.id AND dup.rank > 1
+    """)
+    if cr.rowcount:
+        _logger.warning("Detached the tradeindia ID of %s duplicated leads", cr.rowcount)
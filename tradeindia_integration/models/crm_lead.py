@@ -12,6 +12,12 @@ class CrmLead(models.Model):
     tradeindia_unique_id = fields.Char(
         string="TradeIndia Unique ID",
         readonly=True,
-        index=True,
         help="Unique inquiry ID from TradeIndia"
-    )
\ No newline at end of file
+    )
+
+    # Partial unique index: also serves the IN lookups of the duplicate check
+    # and makes overlapping fetch runs unable to import the same inquiry twice
+    _tradeindia_unique_id_uniq = models.UniqueIndex(
+        '(tradeindia_unique_id) WHERE tradeindia_unique_id IS NOT NULL',
+        "This TradeIndia inquiry has already been imported.",
+    )
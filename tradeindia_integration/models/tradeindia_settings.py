@@ -1,29 +1,129 @@
 # -*- coding: utf-8 -*-
 # FILE: tradeindia_integration/models/tradeindia_settings.py
 
-import requests
 import logging
-from datetime import datetime, timedelta
-from odoo import fields, models, api
+import re
+import time
+import requests
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from odoo import fields, models
 from odoo.exceptions import UserError
+from odoo.addons.lead_ingestion_core.tools import CHUNK_SIZE, JsonArrayStream, http_get, reserve_connections
 
 _logger = logging.getLogger(__name__)
 
+API_URL = "https://www.tradeindia.com/utils/my_inquiry.html"
+# Safety net against an endpoint that never returns a short page
+MAX_PAGES = 1000
+INQUIRY_TIME_FORMATS = ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%d-%m-%Y %H:%M:%S', '%Y-%m-%d %I:%M %p', '%d %b %Y %I:%M %p')
+TEL_LINK = re.compile(r'''href\s*=\s*["']tel:([^"']+)["']''', re.IGNORECASE)
+HTML_TAG = re.compile(r'<[^>]*>')
+
+
+def _fetch_page(url, params, page_no, stream=False):
+    '''Fetch one page of inquiries. Runs in a worker thread, so it reports
+    (status, size, parse seconds) back instead of touching the metrics.
+    With stream, the list is decoded while it downloads and the raw body is
+    never held in memory (the parse time then includes the download).
+
+    The API answers errors (credentials, quota) with HTTP 200 and a JSON
+    object instead of the list: raised, never taken for an empty last page.'''
+    response = http_get(url, params=dict(params, page_no=page_no), stream=stream)
+    with response:
+        response.raise_for_status()
+        started = time.perf_counter()
+        if stream:
+            parser = JsonArrayStream(response.iter_content(CHUNK_SIZE))
+            data, size = list(parser), parser.bytes_read
+            if parser.meta:
+                data = parser.meta
+        else:
+            data, size = response.json(), len(response.content)
+    if not isinstance(data, list):
+        error = (data.get('error') or data.get('message')) if isinstance(data, dict) else None
+        raise UserError(f"TradeIndia API Error (page {page_no}): {error or data}")
+    timing = (response.status_code, size, time.perf_counter() - started)
+    return page_no, data, timing
+
+
+def _inquiry_time(lead):
+    '''generated_date + generated_time as a naive (IST) datetime, or None'''
+    value = f"{lead.get('generated_date') or ''} {lead.get('generated_time') or ''}".strip()
+    for fmt in INQUIRY_TIME_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def _sender_phone(value):
+    '''sender_mobile is plain text or a <a href="tel:...">...</a> link'''
+    value = value or ''
+    link = TEL_LINK.search(value)
+    return (link.group(1) if link else HTML_TAG.sub('', value)).strip()
+
+
+def _rfi_number(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
 class TradeIndiaSettings(models.Model):
     _name = 'tradeindia.settings'
+    _inherit = ['lead.ingestion.source.mixin']
     _description = 'TradeIndia API Settings'
 
-    name = fields.Char(default='TradeIndia API Configuration', readonly=True, required=True)
+    _ingestion_source_name = 'TradeIndia'
+    _ingestion_unique_field = 'tradeindia_unique_id'
+    _ingestion_log_model = 'tradeindia.api.log'
+    _ingestion_push_source = 'tradeindia'
+    _ingestion_description_fields = [
+        ('product', 'Product'), ('subject', 'Subject'), ('message', 'Message'), None,
+        ('query_time', 'Date/Time'), ('channel', 'Source'), ('inquiry_type', 'Type'),
+        ('location', 'Location'), ('unique_id', 'RFI ID'),
+    ]
+
+    name = fields.Char(string="Account", default='TradeIndia API Configuration', required=True)
     userid = fields.Char(string="User ID", help="Your TradeIndia User ID")
     profile_id = fields.Char(string="Profile ID", help="Your TradeIndia Profile ID")
     api_key = fields.Char(string="API Key", help="Your TradeIndia API Key")
+    page_size = fields.Integer(
+        string="Page Size",
+        default=100,
+        help="Inquiries requested per page (the API 'limit' parameter)."
+    )
+    fetch_workers = fields.Integer(
+        string="Parallel Page Requests",
+        default=4,
+        help="Maximum number of pages fetched at the same time."
+    )
+    last_inquiry_time = fields.Datetime(
+        string="Last Inquiry Time (IST)",
+        readonly=True,
+        copy=False,
+        help="generated_date/generated_time of the newest inquiry processed by the scheduled fetch."
+    )
+    last_rfi_id = fields.Char(
+        string="Last RFI ID",
+        readonly=True,
+        copy=False,
+        help="RFI ID of the newest inquiry processed by the scheduled fetch."
+    )
+
+    def _get_api_url(self):
+        '''API_URL, unless the tradeindia_integration.api_url system parameter
+        points elsewhere (e.g. the mock server of the benchmarks)'''
+        return self.env['ir.config_parameter'].sudo().get_param('tradeindia_integration.api_url') or API_URL
 
     def action_test_connection(self):
         self.ensure_one()
         if not self.userid or not self.profile_id or not self.api_key:
             raise UserError("Please enter all required fields before testing.")
         
-        api_url = "https://www.tradeindia.com/utils/my_inquiry.html"
         today_str = datetime.now().strftime('%Y-%m-%d')
         
         params = {
@@ -36,7 +136,7 @@ class TradeIndiaSettings(models.Model):
         }
         
         try:
-            response = requests.get(api_url, params=params, timeout=10)
+            response = http_get(self._get_api_url(), params=params, read_timeout=10)
             response.raise_for_status()
             data = response.json()
             count = len(data) if isinstance(data, list) else 0
@@ -54,139 +154,132 @@ class TradeIndiaSettings(models.Model):
         except Exception as e:
             raise UserError(f"Connection failed: {e}")
 
-    @api.model
-    def _run_scheduled_fetch(self):
-        '''Cron job - runs every 5 minutes to fetch NEW leads only'''
-        _logger.info("=== TradeIndia Scheduled Fetch Started ===")
-        log_vals = {'is_manual': False}
-        
-        try:
-            settings = self.env['tradeindia.settings'].search([], limit=1)
-            if not settings or not settings.userid or not settings.profile_id or not settings.api_key:
-                raise Exception("API credentials not configured")
+    # ------------------------------------------------------------
+    # Ingestion adapter
+    # ------------------------------------------------------------
 
-            today_str = datetime.now().strftime('%Y-%m-%d')
-            _logger.info(f"Fetching NEW leads for: {today_str}")
-            
-            api_url = "https://www.tradeindia.com/utils/my_inquiry.html"
-            params = {
-                'userid': settings.userid,
-                'profile_id': settings.profile_id,
-                'key': settings.api_key,
-                'from_date': today_str,
-                'to_date': today_str,
-                'limit': 100
-            }
+    def _ingestion_check_credentials(self):
+        if not self.userid or not self.profile_id or not self.api_key:
+            raise UserError("API credentials not configured.")
 
-            response = requests.get(api_url, params=params, timeout=30)
-            response.raise_for_status()
-            
-            data = response.json()
-            leads_data = data if isinstance(data, list) else []
-            
-            total_received = len(leads_data)
-            log_vals['leads_fetched'] = total_received
-            _logger.info(f"API returned {total_received} leads")
+    def _ingestion_http_concurrency(self):
+        return max(self.fetch_workers or 1, 1)
 
-            new_leads_count = 0
-            skipped_no_id = 0
-            skipped_duplicates = 0
-            
-            if leads_data:
-                Lead = self.env['crm.lead']
-                
-                # Get or create TradeIndia source
-                tradeindia_source = self.env['utm.source'].search([('name', '=', 'TradeIndia')], limit=1)
-                if not tradeindia_source:
-                    tradeindia_source = self.env['utm.source'].create({'name': 'TradeIndia'})
-                tradeindia_source_id = tradeindia_source.id
-                
-                for lead in leads_data:
-                    unique_id = lead.get('rfi_id')
-                    sender_name = lead.get('sender_name', 'Unknown')
-                    
-                    if not unique_id:
-                        skipped_no_id += 1
-                        _logger.warning(f"» Skipped: {sender_name} - No RFI ID")
-                        continue
+    def _ingestion_fetch_pages(self, from_date=None, to_date=None):
+        '''Dates are YYYY-MM-DD strings, today when not given.
 
-                    # Check for duplicates
-                    existing_lead = Lead.search([('tradeindia_unique_id', '=', str(unique_id))], limit=1)
-                    if existing_lead:
-                        skipped_duplicates += 1
-                        _logger.info(f"» Duplicate: {sender_name} (ID: {unique_id}) - Already exists as Lead #{existing_lead.id}")
-                        continue
+        Without dates (the scheduled fetch) the run is incremental: only
+        inquiries past the stored cursor are yielded, no further page is
+        requested once a page reaches already-seen inquiries (the API lists
+        the newest first), and the cursor moves forward once every page has
+        been ingested.
+        '''
+        incremental = not from_date and not to_date
+        cursor_time = incremental and self.last_inquiry_time
+        cursor_id = incremental and _rfi_number(self.last_rfi_id)
+        newest = None
+        today_str = datetime.now().strftime('%Y-%m-%d')
+        page_size = max(self.page_size or 100, 1)
+        workers = max(self.fetch_workers or 1, 1)
+        params = {
+            'userid': self.userid,
+            'profile_id': self.profile_id,
+            'key': self.api_key,
+            'from_date': from_date or today_str,
+            'to_date': to_date or today_str,
+            'limit': page_size
+        }
+        url = self._get_api_url()
+        metrics = self._ingestion_metrics()
+        stream = self.stream_responses
+        _logger.info(f"Fetching TradeIndia leads: {params['from_date']} to {params['to_date']}")
 
-                    product_name = lead.get('product_name') or lead.get('subject', 'Inquiry')
-                    
-                    vals = {
-                        'type': 'lead',
-                        'name': f"{sender_name} - {product_name}",
-                        'tradeindia_unique_id': str(unique_id),
-                        'contact_name': sender_name,
-                        'probability': 50,
-                        'user_id': False,
-                        'team_id': False,
-                        'source_id': tradeindia_source_id,  # ADDED: Use source_id field
-                    }
-                    
-                    if lead.get('sender_co'):
-                        vals['partner_name'] = lead.get('sender_co')
-                    if lead.get('sender_email'):
-                        vals['email_from'] = lead.get('sender_email')
-                    if lead.get('sender_mobile'):
-                        phone = lead.get('sender_mobile', '').replace('<a href="tel:', '').replace('">', '').replace('</a>', '').strip()
-                        if phone:
-                            vals['phone'] = phone
-                    if lead.get('sender_city'):
-                        vals['city'] = lead.get('sender_city')
-                    if lead.get('address'):
-                        vals['street'] = lead.get('address')
-                    
-                    if lead.get('sender_state'):
-                        state = self.env['res.country.state'].search([('name', '=', lead.get('sender_state'))], limit=1)
-                        if state:
-                            vals['state_id'] = state.id
-                    
-                    if lead.get('sender_country'):
-                        country = self.env['res.country'].search([('name', '=', lead.get('sender_country'))], limit=1)
-                        if country:
-                            vals['country_id'] = country.id
-                    
-                    inquiry_date = f"{lead.get('generated_date', 'N/A')} {lead.get('generated_time', '')}"
-                    vals['description'] = (
-                        f"TradeIndia Lead\n{'='*50}\n"
-                        f"Product: {product_name}\n"
-                        f"Subject: {lead.get('subject', 'N/A')}\n"
-                        f"Message: {lead.get('message', 'N/A')}\n\n"
-                        f"Date/Time: {inquiry_date}\n"
-                        f"Source: {lead.get('source', 'N/A')}\n"
-                        f"Type: {lead.get('inquiry_type', 'N/A')}\n"
-                        f"Location: {lead.get('sender_city', '')}, {lead.get('sender_state', '')}\n"
-                        f"RFI ID: {unique_id}\n"
-                    )
-                    
+        # Page 1 alone first: most runs end there (short page, or already
+        # behind the cursor). Every full page past the cursor then tops up to
+        # `workers` pages in flight, each handed to the caller as soon as it
+        # arrives; the first short page marks the end. Worker threads only
+        # do HTTP, never touch the environment.
+        reserve_connections(workers)
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='tradeindia_fetch')
+        try:
+            pending = {executor.submit(_fetch_page, url, params, 1, stream)}
+            next_page = 2
+            last_page = None
+            while pending:
+                # Wall-clock time spent waiting for pages is the network time
+                with metrics.timed('network'):
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
                     try:
-                        new_lead = Lead.with_context(
-                            default_user_id=False,
-                            default_team_id=False,
-                            mail_create_nosubscribe=True,
-                        ).create(vals)
-                        new_leads_count += 1
-                        _logger.info(f"✓ Created: {sender_name} - {product_name} (Lead ID: {new_lead.id})")
-                    except Exception as e:
-                        _logger.error(f"✗ Failed to create lead for {sender_name}: {str(e)}")
-            
-            message = f"Created {new_leads_count} new leads (API returned {total_received}, {skipped_duplicates} duplicates, {skipped_no_id} without ID)"
-            log_vals.update({
-                'status': 'success',
-                'leads_created': new_leads_count,
-                'response_message': message
-            })
-            _logger.info(f"✓ {message}")
-
-        except Exception as e:
-            log_vals.update({'status': 'failure', 'response_message': str(e)})
-            _logger.error(f"✗ Failed: {e}", exc_info=True)
+                        page_no, records, (status, size, parse_seconds) = future.result()
+                    except requests.HTTPError as e:
+                        metrics.record_response(e.response.status_code, 0)
+                        raise
+                    metrics.record_response(status, size)
+                    metrics.add('parse', parse_seconds)
+                    if last_page is not None and page_no > last_page:
+                        continue
+                    received = len(records)
+                    if incremental:
+                        records = [lead for lead in records if self._is_past_cursor(lead, cursor_time, cursor_id)]
+                        for lead in records:
+                            key = (_inquiry_time(lead), _rfi_number(lead.get('rfi_id')))
+                            if key[0] and key[1] and (newest is None or key > newest):
+                                newest = key
+                    if received < page_size or len(records) < received:
+                        last_page = page_no if last_page is None else min(last_page, page_no)
+                    else:
+                        while last_page is None and len(pending) < workers and next_page <= MAX_PAGES:
+                            pending.add(executor.submit(_fetch_page, url, params, next_page, stream))
+                            next_page += 1
+                    if records:
+                        _logger.info(f"TradeIndia page {page_no}: {len(records)} leads")
+                        yield records
         finally:
-            self.env['tradeindia.api.log'].create(log_vals)
\ No newline at end of file
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        # Only reached when every page was ingested
+        if newest and (not cursor_time or newest > (cursor_time, cursor_id or 0)):
+            self.write({'last_inquiry_time': newest[0], 'last_rfi_id': str(newest[1])})
+            _logger.info(f"TradeIndia cursor moved to RFI {newest[1]} @ {newest[0]}")
+
+    def _is_past_cursor(self, lead, cursor_time, cursor_id):
+        '''Whether an inquiry is newer than the stored cursor. Inquiries that
+        cannot be compared are kept; the duplicate check still applies.'''
+        when = _inquiry_time(lead)
+        rfi_id = _rfi_number(lead.get('rfi_id'))
+        if cursor_time and when and when != cursor_time:
+            return when > cursor_time
+        if cursor_id and rfi_id:
+            return rfi_id > cursor_id
+        return not cursor_time or not when
+
+    def _ingestion_map_record(self, lead):
+        unique_id = lead.get('rfi_id')
+        sender_name = lead.get('sender_name', 'Unknown')
+        product_name = lead.get('product_name') or lead.get('subject', 'Inquiry')
+        phone = _sender_phone(lead.get('sender_mobile'))
+        inquiry_date = f"{lead.get('generated_date') or ''} {lead.get('generated_time') or ''}".strip()
+        return {
+            'unique_id': str(unique_id) if unique_id else False,
+            'name': f"{sender_name} - {product_name}",
+            'contact_name': sender_name,
+            'probability': 50,
+            'partner_name': lead.get('sender_co'),
+            'email_from': lead.get('sender_email'),
+            'phone': phone,
+            'city': lead.get('sender_city'),
+            'street': lead.get('address'),
+            'state': lead.get('sender_state'),
+            'country': lead.get('sender_country'),
+            'inquiry': {
+                'unique_id': str(unique_id) if unique_id else False,
+                'product': product_name,
+                'subject': lead.get('subject'),
+                'message': lead.get('message'),
+                'query_time': inquiry_date,
+                'channel': lead.get('source'),
+                'inquiry_type': lead.get('inquiry_type'),
+                'location': f"{lead.get('sender_city', '')}, {lead.get('sender_state', '')}",
+            },
+        }
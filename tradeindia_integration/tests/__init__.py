@@ -0,0 +1,3 @@
+# -*- coding: utf-8 -*-
+from . import test_tradeindia_fetch
+from . import test_ingestion_benchmark
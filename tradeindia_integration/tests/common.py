@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+# FILE: tradeindia_integration/tests/common.py
+
+from odoo.addons.lead_ingestion_core.tests.common import IngestionBenchmarkCase
+
+
+class TradeIndiaCase(IngestionBenchmarkCase):
+    _api_url_param = 'tradeindia_integration.api_url'
+    _mock_url = 'tradeindia_url'
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.settings = cls.env.ref('tradeindia_integration.tradeindia_settings_default')
+        cls.settings.write({
+            'userid': '1000',
+            'profile_id': '2000',
+            'api_key': 'mock-key',
+            'page_size': 100,
+            'fetch_workers': 4,
+            # Every scheduled run of a test calls the API
+            'adaptive_polling': False,
+        })
+
+    def setUp(self):
+        super().setUp()
+        self.settings.write({'last_inquiry_time': False, 'last_rfi_id': False})
+
+    def count_leads(self, unique_field='tradeindia_unique_id'):
+        return super().count_leads(unique_field)
+
+    def last_log(self):
+        return self.env['tradeindia.api.log'].search([], order='id desc', limit=1)
+
+    def requested_pages(self):
+        return sorted(int(params['page_no']) for _path, params in self.mock.requests)
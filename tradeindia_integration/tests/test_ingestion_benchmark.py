@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+# FILE: tradeindia_integration/tests/test_ingestion_benchmark.py
+'''Throughput benchmarks, not part of the regular test run:
+
+    odoo-bin -d bench -i tradeindia_integration --test-tags lead_ingestion_benchmark --stop-after-init
+
+Sizes can be narrowed with LEAD_INGESTION_BENCHMARK_SIZES=100,10000.
+'''
+
+from odoo.tests import tagged
+from .common import TradeIndiaCase
+
+
+@tagged('-standard', 'post_install', '-at_install', 'lead_ingestion_benchmark')
+class TestTradeIndiaIngestionBenchmark(TradeIndiaCase):
+
+    def test_scheduled_fetch(self):
+        Inquiry = self.env['lead.ingestion.inquiry']
+        for size in self.benchmark_sizes():
+            with self.subTest(size=size):
+                self.mock.reset(total=size)
+                self.settings.write({'last_inquiry_time': False, 'last_rfi_id': False})
+
+                def run():
+                    self.settings._run_scheduled_fetch()
+                    Inquiry._cron_process_pending()
+
+                report = self.run_benchmark('TradeIndia scheduled fetch', size, run, 'tradeindia_unique_id')
+                self.assertEqual(report['created'], size)
+
+    def test_wizard_fetch(self):
+        for size in self.benchmark_sizes():
+            with self.subTest(size=size):
+                self.mock.reset(total=size)
+                wizard = self.env['tradeindia.fetch.leads.wizard'].create({})
+                report = self.run_benchmark('TradeIndia wizard fetch', size, wizard.action_fetch_leads, 'tradeindia_unique_id')
+                self.assertEqual(report['created'], size)
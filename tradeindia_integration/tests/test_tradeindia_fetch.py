@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+# FILE: tradeindia_integration/tests/test_tradeindia_fetch.py
+
+from odoo.tests import tagged
+from odoo.addons.lead_ingestion_core.tests.mock_marketplace import tradeindia_record
+from .common import TradeIndiaCase
+
+
+@tagged('post_install', '-at_install')
+class TestTradeIndiaFetch(TradeIndiaCase):
+
+    def test_scheduled_fetch_pages_and_cursor(self):
+        self.mock.reset(total=250)
+        self.settings._run_scheduled_fetch()
+        self.env['lead.ingestion.inquiry']._cron_process_pending()
+        self.assertEqual(self.count_leads(), 250)
+        self.assertEqual(self.settings.last_rfi_id, str(int(f"{self.mock.batch_prefix}00000000")))
+        self.assertIn(3, self.requested_pages())
+        # Page 1, then at most `workers` pages in flight past the last full one
+        self.assertLessEqual(len(self.mock.requests), 1 + 2 * self.settings.fetch_workers)
+
+        # Nothing new: the first page already reaches the cursor, no fan-out
+        self.mock.requests.clear()
+        self.settings._run_scheduled_fetch()
+        self.assertEqual(len(self.mock.requests), 1)
+        self.assertEqual(self.last_log().http_calls, 1)
+        self.assertEqual(self.last_log().leads_fetched, 0)
+        self.assertEqual(self.count_leads(), 250)
+
+    def test_wizard_fetch(self):
+        self.mock.reset(total=30)
+        self.settings.page_size = 10
+        self.env['tradeindia.fetch.leads.wizard'].create({}).action_fetch_leads()
+        self.assertEqual(self.count_leads(), 30)
+        lead = self.env['crm.lead'].search([('tradeindia_unique_id', '=', f"{self.mock.batch_prefix}00000002")])
+        self.assertEqual(lead.state_id, self.env.ref('base.state_in_ka'))
+        self.assertEqual(lead.phone, f"+91-97{self.mock.batch_prefix}000002", "The tel: link is unwrapped")
+
+    def test_repeat_inquiry_of_same_buyer(self):
+        self.settings.contact_dedup_hours = 24
+        self.mock.reset(total=3)
+        self.settings._run_ingestion(is_manual=True)
+        # Same buyers, new inquiry IDs
+        repeat = [dict(record, rfi_id=f"9{record['rfi_id']}") for record in self.mock._records(tradeindia_record, 0, 3)]
+        stats = self.settings._run_ingestion(is_manual=True, pages=[repeat])
+        self.assertEqual(stats['created'], 0)
+        self.assertEqual(stats['duplicates'], 3)
+
+        self.settings.contact_dedup_hours = 0
+        repeat = [dict(record, rfi_id=f"8{record['rfi_id']}") for record in repeat]
+        self.assertEqual(self.settings._run_ingestion(is_manual=True, pages=[repeat])['created'], 3)
+
+    def test_repeat_buyer_with_new_request(self):
+        self.mock.reset(total=1)
+        first, = self.mock._records(tradeindia_record, 0, 1)
+        second = dict(first, rfi_id=f"9{first['rfi_id']}", product_name='Diesel Generator', subject="Inquiry for Diesel Generator")
+        # Off by default: every inquiry gets its lead
+        self.assertEqual(self.settings._run_ingestion(is_manual=True, pages=[[first, second]])['created'], 2)
+
+        self.settings.contact_dedup_hours = 24
+        third = dict(first, rfi_id=f"8{first['rfi_id']}", product_name='Water Pump', subject="Inquiry for Water Pump")
+        stats = self.settings._run_ingestion(is_manual=True, pages=[[third]])
+        self.assertEqual(stats['created'], 0)
+        lead = self.env['crm.lead'].search([('tradeindia_unique_id', '=', first['rfi_id'])])
+        self.assertIn("Inquiry for Water Pump", lead.message_ids[0].body)
+
+    def test_failed_page_keeps_cursor(self):
+        self.mock.reset(total=250, fail_pages=[2], failure='http')
+        stats = self.settings._run_ingestion(is_manual=False)
+        self.assertTrue(stats['error'])
+        self.assertEqual(self.last_log().status, 'failure')
+        self.assertFalse(self.settings.last_rfi_id, "The cursor only moves after a complete run")
+
+    def test_error_document_keeps_cursor(self):
+        cursor = (self.settings.last_inquiry_time, self.settings.last_rfi_id)
+        # A quota/error document (HTTP 200) on page 2 is no short last page
+        self.mock.reset(total=250, fail_pages=[2], failure='payload')
+        stats = self.settings._run_ingestion(is_manual=False)
+        self.assertIn('Temporary failure', stats['error'])
+        self.assertEqual(self.last_log().status, 'failure')
+        self.assertEqual((self.settings.last_inquiry_time, self.settings.last_rfi_id), cursor)
+
+    def test_slow_responses(self):
+        self.mock.reset(total=40, delay=0.2)
+        self.settings.page_size = 10
+        self.settings._run_ingestion(is_manual=True)
+        self.assertEqual(self.count_leads(), 40)